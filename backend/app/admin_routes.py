@@ -1,12 +1,32 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session
-from typing import List
-from datetime import timedelta
-from database import get_db
-from models import Vendor, Admin, VendorStatus
-from schemas import VendorResponse, UpdateVendorStatus, AdminLogin, Token
-from auth import authenticate_admin, create_access_token, get_current_admin, ACCESS_TOKEN_EXPIRE_MINUTES
+from fastapi import APIRouter, Depends, File, Header, HTTPException, Query, Response, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from datetime import datetime, timedelta
+from database import get_async_db, AsyncSessionLocal
+from models import Vendor, Admin, VendorStatus, DOCUMENT_TYPES
+from schemas import (
+    VendorResponse, VendorSummary, VendorPage, UpdateVendorStatus, AdminLogin, Token, BulkImportResult,
+    BulkStatusUpdate, BulkStatusResult, VendorSearchPage, DuplicateClusterPage, DocumentJobResponse, AuditEventPage
+)
+from stats import adjust_status_count, get_status_counts, stats_cache
+from vendor_cache import vendor_cache
+from documents import get_document_file, vendor_response
+from blob_store import storage_report
+from exports import get_export_documents, stream_documents_zip, vendor_export_query, stream_vendor_export, EXPORT_FORMATS
+from bulk_import import import_vendors, detect_format, IMPORT_BATCH_SIZE
+from search import search_terms, search_vendor_rows
+from identity import duplicate_clusters
+from jobs import get_vendor_jobs
+from audit import audit_log, get_audit_events
+from events import SSE_HEADERS, event_hub, parse_last_event_id
+from previews import PREVIEW_VARIANTS, PREVIEW_CONTENT_TYPE, variant_path
+from storage_compression import codec_of, original_path, iter_stored, compression_stats
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, as_utc, encode_cursor, keyset_after
+from auth import authenticate_admin, create_access_token, get_current_admin, admin_cache, ACCESS_TOKEN_EXPIRE_MINUTES
+import mimetypes
 import os
 
 router = APIRouter(prefix="/api/admin", tags=["Admin"])
@@ -15,11 +35,11 @@ router = APIRouter(prefix="/api/admin", tags=["Admin"])
 @router.post("/login", response_model=Token)
 async def admin_login(
     login_data: AdminLogin,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Admin login endpoint"""
     
-    admin = authenticate_admin(db, login_data.username, login_data.password)
+    admin = await authenticate_admin(db, login_data.username, login_data.password)
     if not admin:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -35,52 +55,175 @@ async def admin_login(
     
     return {"access_token": access_token, "token_type": "bearer"}
 
-# 2. Get All Vendors
-@router.get("/vendors", response_model=List[VendorResponse])
+# Columns the vendor list can project
+VENDOR_LIST_FIELDS = [column.key for column in Vendor.__table__.columns]
+DEFAULT_LIST_FIELDS = list(VendorSummary.model_fields)
+
+# Vendor columns from a comma-separated ?fields= value
+def _parse_fields(fields: Optional[str], default: List[str]) -> List[str]:
+    if not fields:
+        return default
+    requested = list(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    invalid = [name for name in requested if name not in VENDOR_LIST_FIELDS]
+    if invalid:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid fields: {', '.join(invalid)}. Valid fields: {', '.join(VENDOR_LIST_FIELDS)}"
+        )
+    return requested or default
+
+# Query for one page of the vendor list (newest first)
+def vendor_list_query(fields: List[str], status_filter: Optional[VendorStatus], cursor: Optional[str], limit: int):
+    # Only read the projected columns, plus the keyset columns for the cursor
+    selected = list(dict.fromkeys(fields + ["id", "created_at"]))
+    query = select(*[getattr(Vendor, name) for name in selected])
+    
+    if status_filter:
+        query = query.where(Vendor.status == status_filter)
+    if cursor:
+        query = query.where(keyset_after(Vendor.created_at, Vendor.id, cursor))
+    
+    return query.order_by(Vendor.created_at.desc().nullslast(), Vendor.id.desc()).limit(limit)
+
+# 2. Get All Vendors (paginated)
+@router.get("/vendors", response_model=VendorPage)
 async def get_all_vendors(
     status_filter: VendorStatus = None,
-    db: Session = Depends(get_db),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated vendor columns to return"),
+    db: AsyncSession = Depends(get_async_db),
     current_admin: Admin = Depends(get_current_admin)
 ):
-    """Get all vendors (with optional status filter)"""
+    """Get vendors newest first, one page at a time (with optional status filter)"""
     
-    query = db.query(Vendor)
+    requested = _parse_fields(fields, DEFAULT_LIST_FIELDS)
+    rows = (await db.execute(vendor_list_query(requested, status_filter, cursor, limit + 1))).all()
     
-    if status_filter:
-        query = query.filter(Vendor.status == status_filter)
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+    
+    items = [{name: getattr(row, name) for name in requested} for row in rows]
+    return {"items": items, "next_cursor": next_cursor}
+
+# 2b. Export Vendors (declared before /vendors/{vendor_id} so "export" is not taken as an ID)
+@router.get("/vendors/export")
+async def export_vendors(
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    status_filter: VendorStatus = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated vendor columns (default: all)"),
+    current_admin: Admin = Depends(get_current_admin)
+):
+    """Stream vendors as CSV or NDJSON, oldest first, with optional status and created_at range filters"""
     
-    vendors = query.order_by(Vendor.created_at.desc()).all()
-    return vendors
+    requested = _parse_fields(fields, VENDOR_LIST_FIELDS)
+    query = vendor_export_query(requested, status_filter, created_from, created_to)
+    return StreamingResponse(
+        stream_vendor_export(AsyncSessionLocal, query, requested, format),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="vendors.{format}"'}
+    )
+
+# Deepest page a search can reach; ranked results cannot use a keyset cursor
+MAX_SEARCH_OFFSET = 10000
+
+# 2c. Search Vendors
+@router.get("/vendors/search", response_model=VendorSearchPage)
+async def search_vendors(
+    q: str = Query(..., min_length=1, max_length=200),
+    status_filter: VendorStatus = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0, le=MAX_SEARCH_OFFSET),
+    fields: Optional[str] = Query(None, description="Comma-separated vendor columns to return"),
+    db: AsyncSession = Depends(get_async_db),
+    current_admin: Admin = Depends(get_current_admin)
+):
+    """
+    Full-text search over vendor ID, name, business name, email, phone, PAN,
+    GST and city. Every word must match the start of a word in one of them
+    ("ravi kum" finds "Ravi Kumar"); best matches come first, or newest
+    first when the words match too many vendors to rank.
+    """
+    
+    terms = search_terms(q)
+    if not terms:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Search query must contain letters or digits"
+        )
+    requested = _parse_fields(fields, DEFAULT_LIST_FIELDS)
+    
+    rows = await search_vendor_rows(db, terms, requested, status_filter, limit + 1, offset)
+    
+    next_offset = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        if offset + limit <= MAX_SEARCH_OFFSET:
+            next_offset = offset + limit
+    
+    items = [{name: getattr(row, name) for name in requested} for row in rows]
+    return {"items": items, "next_offset": next_offset}
+
+# 2d. List Duplicate Identity Clusters
+@router.get("/vendors/duplicates", response_model=DuplicateClusterPage)
+async def get_duplicate_vendors(
+    kind: Optional[str] = Query(None, pattern="^(pan|aadhaar|gst|phone)$"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_admin: Admin = Depends(get_current_admin)
+):
+    """Groups of vendors that share a PAN, Aadhaar, GST number or phone"""
+    
+    clusters, next_cursor = await duplicate_clusters(db, kind, cursor, limit)
+    return {"clusters": clusters, "next_cursor": next_cursor}
 
 # 3. Get Single Vendor Details
 @router.get("/vendors/{vendor_id}", response_model=VendorResponse)
 async def get_vendor_by_id(
     vendor_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_admin: Admin = Depends(get_current_admin)
 ):
     """Get vendor details by ID"""
     
-    vendor = db.query(Vendor).filter(Vendor.vendor_id == vendor_id).first()
+    result = await db.execute(select(Vendor).where(Vendor.vendor_id == vendor_id))
+    vendor = result.scalars().first()
     if not vendor:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Vendor not found"
         )
     
-    return vendor
+    return await vendor_response(db, vendor)
+
+# Rejection reason to store for a status update (required when rejecting)
+def _rejection_reason(status_update) -> Optional[str]:
+    if status_update.status != VendorStatus.REJECTED:
+        return None
+    if not status_update.rejection_reason:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Rejection reason is required when rejecting a vendor"
+        )
+    return status_update.rejection_reason
 
 # 4. Update Vendor Status (Approve/Reject)
 @router.put("/vendors/{vendor_id}/status", response_model=VendorResponse)
 async def update_vendor_status(
     vendor_id: str,
     status_update: UpdateVendorStatus,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_admin: Admin = Depends(get_current_admin)
 ):
     """Update vendor status (approve or reject)"""
     
-    vendor = db.query(Vendor).filter(Vendor.vendor_id == vendor_id).first()
+    result = await db.execute(select(Vendor).where(Vendor.vendor_id == vendor_id))
+    vendor = result.scalars().first()
     if not vendor:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -88,117 +231,442 @@ async def update_vendor_status(
         )
     
     # Update status
+    previous_status = vendor.status
     vendor.status = status_update.status
     
     # If rejected, store reason
-    if status_update.status == VendorStatus.REJECTED:
-        if not status_update.rejection_reason:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Rejection reason is required when rejecting a vendor"
+    vendor.rejection_reason = _rejection_reason(status_update)
+    
+    try:
+        if previous_status != status_update.status:
+            # Guard against a concurrent review so the status counters stay exact
+            result = await db.execute(
+                update(Vendor)
+                .where(Vendor.id == vendor.id, Vendor.status == previous_status)
+                .values(status=status_update.status)
+                .execution_options(synchronize_session=False)
             )
-        vendor.rejection_reason = status_update.rejection_reason
+            if not result.rowcount:
+                await db.rollback()
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="Vendor status was changed by another request, please reload"
+                )
+            if previous_status is not None:
+                await adjust_status_count(db, previous_status, -1)
+            await adjust_status_count(db, status_update.status, 1)
+        await db.commit()
+        stats_cache.clear()
+        await vendor_cache.invalidate(vendor_id)
+        await db.refresh(vendor)
+    except HTTPException:
+        raise
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to update vendor status: {str(e)}"
+        )
+    
+    await audit_log.record(vendor_id, status_update.status.value, current_admin.username,
+                           comment=vendor.rejection_reason, details={"from": previous_status})
+    event_hub.publish("status_changed", {
+        "vendor_id": vendor_id, "status": status_update.status.value, "previous_status": previous_status,
+        "rejection_reason": vendor.rejection_reason,
+    }, vendor_id)
+    return await vendor_response(db, vendor)
+
+# 4b. Bulk Update Vendor Status
+@router.post("/vendors/bulk-status", response_model=BulkStatusResult)
+async def bulk_update_vendor_status(
+    bulk_update: BulkStatusUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_admin: Admin = Depends(get_current_admin)
+):
+    """
+    Approve or reject many vendors in one transaction, selected by
+    vendor_ids or by a filter (current_status / created_before).
+    Each previous-status group is changed with one guarded UPDATE, so a
+    vendor reviewed concurrently is reported as a conflict, not overwritten.
+    """
+    
+    rejection_reason = _rejection_reason(bulk_update)
+    
+    if bulk_update.vendor_ids:
+        vendor_ids = list(dict.fromkeys(bulk_update.vendor_ids))
+        query = select(Vendor.vendor_id, Vendor.status).where(Vendor.vendor_id.in_(vendor_ids))
+    elif bulk_update.current_status or bulk_update.created_before:
+        query = select(Vendor.vendor_id, Vendor.status)
+        if bulk_update.current_status:
+            query = query.where(Vendor.status == bulk_update.current_status)
+        if bulk_update.created_before:
+            query = query.where(Vendor.created_at < as_utc(bulk_update.created_before))
+        query = query.order_by(Vendor.created_at, Vendor.id).limit(bulk_update.limit)
+        vendor_ids = None
     else:
-        vendor.rejection_reason = None
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Give vendor_ids or a filter (current_status, created_before)"
+        )
     
     try:
-        db.commit()
-        db.refresh(vendor)
+        current = {vendor_id: vendor_status for vendor_id, vendor_status in await db.execute(query)}
+        if vendor_ids is None:
+            vendor_ids = list(current)
+        
+        groups = {}
+        for vendor_id, vendor_status in current.items():
+            groups.setdefault(vendor_status, []).append(vendor_id)
+        
+        updated = set()
+        transitions = []
+        for previous_status, group in groups.items():
+            result = await db.execute(
+                update(Vendor)
+                .where(Vendor.vendor_id.in_(group), Vendor.status.is_not_distinct_from(previous_status))
+                .values(status=bulk_update.status, rejection_reason=rejection_reason)
+                .returning(Vendor.vendor_id)
+            )
+            changed = set(result.scalars())
+            updated |= changed
+            transitions.append((previous_status, sorted(changed)))
+            if previous_status != bulk_update.status and changed:
+                if previous_status is not None:
+                    await adjust_status_count(db, previous_status, -len(changed))
+                await adjust_status_count(db, bulk_update.status, len(changed))
+        await db.commit()
+        stats_cache.clear()
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to update vendor status: {str(e)}"
         )
     
-    return vendor
+    for vendor_id in updated:
+        await vendor_cache.invalidate(vendor_id)
+    for previous_status, changed in transitions:
+        await audit_log.record_many(changed, bulk_update.status.value, current_admin.username,
+                                    comment=rejection_reason, details={"from": previous_status, "bulk": True})
+        # Each vendor hears about its own change; admins get one summary instead of one event per vendor
+        for vendor_id in changed:
+            event_hub.publish("status_changed", {
+                "vendor_id": vendor_id, "status": bulk_update.status.value, "previous_status": previous_status,
+                "rejection_reason": rejection_reason,
+            }, vendor_id, admin=False)
+    if updated:
+        event_hub.publish("bulk_status_changed", {
+            "status": bulk_update.status.value, "updated": len(updated),
+            "from": {(previous_status.value if previous_status else None): len(changed) for previous_status, changed in transitions if changed},
+        })
+    
+    results = []
+    for vendor_id in vendor_ids:
+        if vendor_id not in current:
+            results.append({"vendor_id": vendor_id, "result": "not_found"})
+        else:
+            results.append({
+                "vendor_id": vendor_id,
+                "result": "updated" if vendor_id in updated else "conflict",
+                "previous_status": current[vendor_id]
+            })
+    
+    return {
+        "status": bulk_update.status,
+        "requested": len(vendor_ids),
+        "updated": len(updated),
+        "results": results
+    }
+
+# Documents are private and may be replaced under the same URL: clients keep
+# a copy but must revalidate it (a 304 when the content is unchanged)
+DOCUMENT_CACHE_CONTROL = "private, no-cache"
+
+# Whether Accept-Encoding allows gzip ("gzip;q=0" refuses it)
+def _accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    for coding in (accept_encoding or "").split(","):
+        name, _, params = coding.partition(";")
+        if name.strip().lower() == "gzip":
+            quality = params.replace(" ", "").lower()
+            try:
+                return not quality.startswith("q=") or float(quality[2:]) > 0
+            except ValueError:
+                return False
+    return False
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match uses weak comparison (RFC 9110 13.1.2)"""
+    if if_none_match.strip() == "*":
+        return True
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag in tags
 
 # 5. Download Vendor Document
 @router.get("/vendors/{vendor_id}/documents/{doc_type}")
 async def download_document(
     vendor_id: str,
     doc_type: str,
-    db: Session = Depends(get_db),
+    variant: Optional[str] = Query(None, description="thumb or preview: a downscaled JPEG instead of the original"),
+    if_none_match: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
     current_admin: Admin = Depends(get_current_admin)
 ):
-    """Download vendor KYC document by type"""
+    """
+    Download vendor KYC document by type
+    The ETag is the SHA-256 of the content; If-None-Match gets a 304 without
+    touching the file, and Range / If-Range requests get 206 partial content.
+    A ?variant= that has not been rendered (yet) serves the original.
+    Documents compressed at rest are streamed decompressed, without Range
+    support, unless the client accepts the stored gzip encoding.
+    """
     
-    vendor = db.query(Vendor).filter(Vendor.vendor_id == vendor_id).first()
-    if not vendor:
+    if doc_type not in DOCUMENT_TYPES:
+        valid_types = ", ".join(DOCUMENT_TYPES)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid document type. Valid types: {valid_types}"
+        )
+    if variant and variant not in PREVIEW_VARIANTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid variant. Valid variants: {', '.join(PREVIEW_VARIANTS)}"
+        )
+    
+    document = await get_document_file(db, vendor_id, doc_type)
+    
+    if not document:
+        # Tell a missing vendor apart from a missing document
+        result = await db.execute(select(Vendor.id).where(Vendor.vendor_id == vendor_id))
+        if result.first() is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Vendor not found"
+            )
+    
+    not_found = HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=f"{doc_type.replace('_', ' ').title()} document not found"
+    )
+    if not document:
+        raise not_found
+    
+    headers = {"Cache-Control": DOCUMENT_CACHE_CONTROL}
+    path, media_type, stat_result, representation = document.path, None, None, None
+    if variant:
+        preview_path = variant_path(document.path, variant)
+        try:
+            stat_result = await run_in_threadpool(os.stat, preview_path)
+            path, media_type, representation = preview_path, PREVIEW_CONTENT_TYPE, variant
+        except FileNotFoundError:
+            pass
+    
+    # Compressed at rest: gzip goes out as stored to clients that accept it,
+    # anything else is decompressed on the fly
+    codec = None if representation else codec_of(path)
+    if codec:
+        headers["Vary"] = "Accept-Encoding"
+        media_type = mimetypes.guess_type(original_path(path))[0] or "application/octet-stream"
+        if codec == "gzip" and _accepts_gzip(accept_encoding):
+            headers["Content-Encoding"] = representation = "gzip"
+    
+    if document.checksum:
+        headers["ETag"] = f'"{document.checksum}-{representation}"' if representation else f'"{document.checksum}"'
+        if if_none_match and _etag_matches(if_none_match, headers["ETag"]):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    # One stat serves both the existence check and the response headers
+    if stat_result is None:
+        try:
+            stat_result = await run_in_threadpool(os.stat, path)
+        except FileNotFoundError:
+            raise not_found
+    
+    if codec and not representation:
+        if document.size is not None:
+            headers["Content-Length"] = str(document.size)
+        return StreamingResponse(iter_stored(path), media_type=media_type, headers=headers)
+    
+    # FileResponse handles Range/If-Range and uses zero-copy http.response.pathsend
+    # when the server supports it
+    return FileResponse(path, media_type=media_type, headers=headers, stat_result=stat_result)
+
+# 5b. Download all documents of a vendor as one ZIP
+@router.get("/vendors/{vendor_id}/documents.zip")
+async def download_vendor_documents_zip(
+    vendor_id: str,
+    db: AsyncSession = Depends(get_async_db),
+    current_admin: Admin = Depends(get_current_admin)
+):
+    """Stream every KYC document of a vendor as a ZIP archive"""
+    
+    result = await db.execute(select(Vendor.id).where(Vendor.vendor_id == vendor_id))
+    if result.first() is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Vendor not found"
         )
     
-    # Map document types to vendor attributes
-    doc_mapping = {
-        # Identity Proof Documents
-        "aadhaar": vendor.aadhaar_document,
-        "pan": vendor.pan_document,
-        "passport": vendor.passport_document,
-        "voter_id": vendor.voter_id_document,
-        "driving_license": vendor.driving_license_document,
-        # Address Proof Documents
-        "address_proof_aadhaar": vendor.address_proof_aadhaar,
-        "address_proof_passport": vendor.address_proof_passport,
-        "address_proof_voter_id": vendor.address_proof_voter_id,
-        "address_proof_driving_license": vendor.address_proof_driving_license,
-        "address_proof_electricity_bill": vendor.address_proof_electricity_bill,
-        "address_proof_water_gas_bill": vendor.address_proof_water_gas_bill,
-        "address_proof_bank_statement": vendor.address_proof_bank_statement,
-        # Photograph
-        "passport_photo": vendor.passport_photo,
-        "live_selfie": vendor.live_selfie,
-        # Business Documents
-        "gst_certificate": vendor.gst_certificate,
-        "partnership_deed": vendor.partnership_deed,
-        "certificate_of_incorporation": vendor.certificate_of_incorporation,
-        "memorandum_articles": vendor.memorandum_articles,
-        "shop_establishment_certificate": vendor.shop_establishment_certificate,
-        # Additional Documents
-        "college_id_document": vendor.college_id_document,
-        "local_address_proof": vendor.local_address_proof,
-        "guardians_kyc_documents": vendor.guardians_kyc_documents,
-        "birth_certificate_document": vendor.birth_certificate_document,
-        "visa_document": vendor.visa_document,
-        "oci_card_document": vendor.oci_card_document,
-        "overseas_address_proof": vendor.overseas_address_proof,
-        "fatca_declaration_document": vendor.fatca_declaration_document,
-    }
-    
-    file_path = doc_mapping.get(doc_type)
+    documents = await get_export_documents(db, [vendor_id])
+    await db.close()  # Release the connection before the (long) stream starts
+    return StreamingResponse(
+        stream_documents_zip(documents, per_vendor_folders=False),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{vendor_id}-kyc.zip"'}
+    )
+
+# 5c. Download documents of several vendors as one ZIP
+@router.get("/documents.zip")
+async def download_documents_zip(
+    vendor_id: List[str] = Query(..., max_length=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db),
+    current_admin: Admin = Depends(get_current_admin)
+):
+    """Stream the KYC documents of the given vendors (?vendor_id=...&vendor_id=...) as one ZIP, a folder per vendor"""
     
-    if file_path is None:
-        valid_types = ", ".join(doc_mapping.keys())
+    vendor_ids = list(dict.fromkeys(vendor_id))
+    result = await db.execute(select(Vendor.vendor_id).where(Vendor.vendor_id.in_(vendor_ids)))
+    found = set(result.scalars())
+    missing = [vendor for vendor in vendor_ids if vendor not in found]
+    if missing:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Invalid document type. Valid types: {valid_types}"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Vendors not found: {', '.join(missing)}"
         )
     
-    if not file_path or not os.path.exists(file_path):
+    documents = await get_export_documents(db, vendor_ids)
+    await db.close()  # Release the connection before the (long) stream starts
+    return StreamingResponse(
+        stream_documents_zip(documents),
+        media_type="application/zip",
+        headers={"Content-Disposition": 'attachment; filename="vendors-kyc.zip"'}
+    )
+
+# 5d. Document Processing Jobs of a Vendor
+@router.get("/vendors/{vendor_id}/jobs", response_model=List[DocumentJobResponse])
+async def get_vendor_document_jobs(
+    vendor_id: str,
+    doc_type: Optional[str] = Query(None, description="Only jobs for this document type"),
+    db: AsyncSession = Depends(get_async_db),
+    current_admin: Admin = Depends(get_current_admin)
+):
+    """Get the background processing status of a vendor's documents (newest first)"""
+    
+    result = await db.execute(select(Vendor.id).where(Vendor.vendor_id == vendor_id))
+    if result.first() is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"{doc_type.replace('_', ' ').title()} document not found"
+            detail="Vendor not found"
         )
     
-    return FileResponse(file_path)
+    return await get_vendor_jobs(db, vendor_id, doc_type)
 
 # 6. Get Dashboard Statistics
 @router.get("/dashboard/stats")
 async def get_dashboard_stats(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_admin: Admin = Depends(get_current_admin)
 ):
     """Get dashboard statistics"""
     
-    total_vendors = db.query(Vendor).count()
-    pending_vendors = db.query(Vendor).filter(Vendor.status == VendorStatus.PENDING).count()
-    approved_vendors = db.query(Vendor).filter(Vendor.status == VendorStatus.APPROVED).count()
-    rejected_vendors = db.query(Vendor).filter(Vendor.status == VendorStatus.REJECTED).count()
+    return await get_status_counts(db)
+
+# 7. Get Cache Statistics
+@router.get("/cache/stats")
+async def get_cache_stats(
+    current_admin: Admin = Depends(get_current_admin)
+):
+    """Get hit/miss counters for the in-process caches"""
     
     return {
-        "total_vendors": total_vendors,
-        "pending": pending_vendors,
-        "approved": approved_vendors,
-        "rejected": rejected_vendors
-    }
\ No newline at end of file
+        "admin_auth": admin_cache.stats(),
+        "vendor": vendor_cache.stats(),
+        "event_streams": event_hub.stats()
+    }
+
+# 8. Storage Dedup Report
+@router.get("/storage/report")
+async def get_storage_report(
+    current_admin: Admin = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get bytes referenced by documents vs. bytes stored after deduplication and compression"""
+    
+    report = await db.run_sync(storage_report)
+    report["compression_cpu"] = compression_stats()  # This process since startup
+    return report
+
+# 9. Bulk Import Vendors
+@router.post("/vendors/import", response_model=BulkImportResult)
+async def bulk_import_vendors(
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, pattern="^(ndjson|csv)$"),  # Default: from the file name
+    dry_run: bool = Query(False),
+    batch_size: int = Query(IMPORT_BATCH_SIZE, ge=1, le=10000),
+    db: AsyncSession = Depends(get_async_db),
+    current_admin: Admin = Depends(get_current_admin)
+):
+    """
+    Import vendors from an NDJSON or CSV file of VendorCreate records.
+    Valid rows are inserted in batches; the report lists each created
+    vendor and every rejected row with its line number.
+    """
+    
+    try:
+        report = await import_vendors(db, file.file, format or detect_format(file.filename), batch_size, dry_run)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to import vendors: {str(e)}"
+        )
+    
+    await audit_log.record_many([created["vendor_id"] for created in report["created"]], "registered",
+                                current_admin.username, details={"bulk_import": file.filename})
+    if report["created"]:
+        event_hub.publish("vendors_imported", {"created": len(report["created"])})
+    return report
+
+# 10. Vendor Audit Trail
+@router.get("/vendors/{vendor_id}/audit", response_model=AuditEventPage)
+async def get_vendor_audit(
+    vendor_id: str,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_admin: Admin = Depends(get_current_admin)
+):
+    """Get a vendor's audit trail newest first, one page at a time"""
+    
+    # Write this worker's buffered events first so the trail includes them
+    await audit_log.flush()
+    items, next_cursor = await get_audit_events(db, vendor_id, cursor, limit)
+    if not items and not cursor:
+        result = await db.execute(select(Vendor.id).where(Vendor.vendor_id == vendor_id))
+        if result.first() is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Vendor not found"
+            )
+    return {"items": items, "next_cursor": next_cursor}
+
+# 11. Stream Vendor Events (live dashboard)
+@router.get("/events")
+async def stream_admin_events(
+    last_event_id: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+    current_admin: Admin = Depends(get_current_admin)
+):
+    """Server-sent events: the dashboard counts, then registrations, uploads and status changes of all vendors"""
+    
+    # Changes committed while the snapshot loads are replayed, not missed
+    since = parse_last_event_id(last_event_id)
+    if since is None:
+        since = event_hub.last_event_id
+    snapshot = ("stats", await get_status_counts(db))
+    # The stream outlives the request; don't hold a database connection for it
+    await db.close()
+    return StreamingResponse(
+        event_hub.stream(None, snapshot, since),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
\ No newline at end of file
@@ -0,0 +1,137 @@
+"""
+Write-behind audit trail of vendor changes.
+
+Routes call audit_log.record(...) after their own commit; that only appends
+to an in-process buffer. A background flusher writes the buffer to
+vendor_audit_log in batches (one executemany per AUDIT_FLUSH_BATCH events)
+every AUDIT_FLUSH_SECONDS, or sooner once a batch is full. The buffer is
+bounded: when AUDIT_BUFFER_LIMIT events are waiting, record() flushes
+inline, so a slow database slows writers down instead of growing memory.
+Shutdown flushes everything that is left.
+
+Events still in the buffer when the process dies are lost; the window is
+at most AUDIT_FLUSH_SECONDS of changes.
+"""
+import asyncio
+import json
+import os
+from collections import deque
+from datetime import datetime, timezone
+from typing import List, Optional
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import async_engine
+from models import AuditEvent
+from pagination import encode_cursor, keyset_after
+
+AUDIT_FLUSH_SECONDS = float(os.getenv("AUDIT_FLUSH_SECONDS", "1"))
+AUDIT_FLUSH_BATCH = 500
+AUDIT_BUFFER_LIMIT = int(os.getenv("AUDIT_BUFFER_LIMIT", "10000"))
+
+class AuditLog:
+    def __init__(self):
+        self._buffer = deque()
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self.written = 0
+        self.failed_flushes = 0
+    
+    def start(self):
+        if self._task:
+            return
+        self._wake = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._task = asyncio.create_task(self._run())
+    
+    # Buffer one event
+    async def record(self, vendor_id: str, action: str, action_by: Optional[str] = None,
+                     comment: Optional[str] = None, details: Optional[dict] = None):
+        await self.record_many([vendor_id], action, action_by, comment, details)
+    
+    # Buffer the same event for several vendors (bulk actions)
+    async def record_many(self, vendor_ids: List[str], action: str, action_by: Optional[str] = None,
+                          comment: Optional[str] = None, details: Optional[dict] = None):
+        timestamp = datetime.now(timezone.utc)
+        encoded = json.dumps(details, default=str) if details else None
+        self._buffer.extend(
+            {"vendor_id": vendor_id, "action": action, "action_by": action_by,
+             "comment": comment, "details": encoded, "timestamp": timestamp}
+            for vendor_id in vendor_ids
+        )
+        if not self._task or len(self._buffer) >= AUDIT_BUFFER_LIMIT:
+            # No flusher (scripts) or backpressure; the change itself is already committed
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"⚠️  Could not write {len(self._buffer)} audit events, keeping them buffered: {e}")
+        elif len(self._buffer) >= AUDIT_FLUSH_BATCH:
+            self._wake.set()
+    
+    # Write everything buffered so far
+    async def flush(self):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while self._buffer:
+                batch = [self._buffer.popleft() for _ in range(min(AUDIT_FLUSH_BATCH, len(self._buffer)))]
+                try:
+                    async with async_engine.begin() as conn:
+                        await conn.execute(insert(AuditEvent.__table__), batch)
+                except BaseException:
+                    # Keep the events (in order) for the next attempt, also when cancelled at shutdown
+                    self._buffer.extendleft(reversed(batch))
+                    self.failed_flushes += 1
+                    raise
+                self.written += len(batch)
+    
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), AUDIT_FLUSH_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️  Could not write {len(self._buffer)} audit events, retrying: {e}")
+    
+    # Stop the flusher and write what is left
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            print(f"❌ Lost {len(self._buffer)} audit events at shutdown: {e}")
+    
+    def stats(self) -> dict:
+        return {"buffered": len(self._buffer), "written": self.written, "failed_flushes": self.failed_flushes}
+
+audit_log = AuditLog()
+
+# One page of a vendor's audit trail, newest first
+async def get_audit_events(db: AsyncSession, vendor_id: str, cursor: Optional[str], limit: int):
+    """Returns (events, next cursor or None)"""
+    query = select(AuditEvent).where(AuditEvent.vendor_id == vendor_id)
+    if cursor:
+        query = query.where(keyset_after(AuditEvent.timestamp, AuditEvent.id, cursor))
+    result = await db.execute(query.order_by(AuditEvent.timestamp.desc(), AuditEvent.id.desc()).limit(limit + 1))
+    events = result.scalars().all()
+    
+    next_cursor = None
+    if len(events) > limit:
+        events = events[:limit]
+        next_cursor = encode_cursor(events[-1].timestamp, events[-1].id)
+    return [
+        {
+            "id": event.id, "action": event.action, "action_by": event.action_by, "comment": event.comment,
+            "details": json.loads(event.details) if event.details else None, "timestamp": event.timestamp,
+        }
+        for event in events
+    ], next_cursor
\ No newline at end of file
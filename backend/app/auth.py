@@ -1,21 +1,41 @@
+import asyncio
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-from database import get_db
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
+from database import get_async_db
 from models import Admin
+from cache import TTLCache
 
 # Security Configuration
 SECRET_KEY = "your-secret-key-change-this-in-production"  # Change this!
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 1440  # 24 hours
 
+# Verified tokens -> admin principal. Entries never outlive the token's exp;
+# ADMIN_CACHE_TTL_SECONDS bounds how long other workers may serve a changed admin.
+ADMIN_CACHE_TTL_SECONDS = 60
+admin_cache = TTLCache(maxsize=1024, ttl=ADMIN_CACHE_TTL_SECONDS)
+
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt runs on its own small thread pool so logins never block the event loop
+# or take every threadpool slot; beyond MAX_PENDING_PASSWORD_CHECKS queued
+# checks new logins are turned away instead of piling up
+PASSWORD_HASH_WORKERS = 2
+MAX_PENDING_PASSWORD_CHECKS = 32
+_password_executor: Optional[ThreadPoolExecutor] = None
+_password_slots = asyncio.Semaphore(MAX_PENDING_PASSWORD_CHECKS)
+
 # Security scheme
 security = HTTPBearer()
 
@@ -27,6 +47,39 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+# Run a password hashing function on the bcrypt pool
+async def _run_password_task(func, *args):
+    if _password_slots.locked():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many login attempts in progress, please retry shortly",
+            headers={"Retry-After": "1"},
+        )
+    async with _password_slots:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_password_executor(), func, *args)
+
+def _get_password_executor() -> ThreadPoolExecutor:
+    global _password_executor
+    if _password_executor is None:
+        _password_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+    return _password_executor
+
+# Verify password without blocking the event loop
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_password_task(verify_password, plain_password, hashed_password)
+
+# Hash password without blocking the event loop
+async def get_password_hash_async(password: str) -> str:
+    return await _run_password_task(get_password_hash, password)
+
+# Stop the bcrypt pool (application shutdown); waits for running hashes off the event loop
+async def shutdown_password_executor():
+    global _password_executor
+    if _password_executor is not None:
+        executor, _password_executor = _password_executor, None
+        await asyncio.to_thread(executor.shutdown, wait=True, cancel_futures=True)
+
 # Create access token
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -39,26 +92,59 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 # Authenticate admin
-def authenticate_admin(db: Session, username: str, password: str):
-    admin = db.query(Admin).filter(Admin.username == username).first()
+async def authenticate_admin(db: AsyncSession, username: str, password: str):
+    result = await db.execute(select(Admin).where(Admin.username == username))
+    admin = result.scalars().first()
     if not admin:
         return False
-    if not verify_password(password, admin.hashed_password):
+    # Give the connection back to the pool while bcrypt runs
+    await db.close()
+    if not await verify_password_async(password, admin.hashed_password):
         return False
     return admin
 
+# Drop cached principals for an admin (after it is changed or deleted)
+def invalidate_admin(admin_id: int):
+    admin_cache.delete_where(lambda key, admin: admin.id == admin_id)
+
+# Changed admins are evicted once their transaction commits: by id, so a
+# renamed admin's old tokens go too, and not at flush, where a concurrent
+# request could cache the old row again before the commit
+@event.listens_for(Admin, "after_update")
+@event.listens_for(Admin, "after_delete")
+def _invalidate_changed_admin(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("changed_admins", set()).add(target.id)
+    else:
+        invalidate_admin(target.id)
+
+@event.listens_for(Session, "after_commit")
+def _evict_committed_admins(session):
+    for admin_id in session.info.pop("changed_admins", ()):
+        invalidate_admin(admin_id)
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_admins(session):
+    session.info.pop("changed_admins", None)
+
 # Verify token and get current admin
-def get_current_admin(
+async def get_current_admin(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    token = credentials.credentials
+    cache_key = hashlib.sha256(token.encode()).hexdigest()
+    admin = admin_cache.get(cache_key)
+    if admin is not None:
+        return admin
+    
     try:
-        token = credentials.credentials
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
         if username is None:
@@ -66,7 +152,14 @@ def get_current_admin(
     except JWTError:
         raise credentials_exception
     
-    admin = db.query(Admin).filter(Admin.username == username).first()
+    result = await db.execute(select(Admin).where(Admin.username == username))
+    admin = result.scalars().first()
     if admin is None:
         raise credentials_exception
+    
+    # Cache the detached admin until the token expires (capped by the cache TTL)
+    expires_in = payload.get("exp", 0) - time.time()
+    if expires_in > 0:
+        db.expunge(admin)
+        admin_cache.set(cache_key, admin, ttl=min(expires_in, ADMIN_CACHE_TTL_SECONDS))
     return admin
\ No newline at end of file
@@ -0,0 +1,394 @@
+"""
+Content-addressed, deduplicated storage for KYC documents.
+
+Every distinct file content is stored once under UPLOAD_DIR/blobs, named by its
+SHA-256, and reference counted in document_blobs. vendor_documents rows point
+at the blob (path + checksum). Blobs whose count drops to zero are removed by
+collect_garbage (with their preview variants) after a grace period, so an upload that reuses a blob while it
+is being released never loses its file. A re-upload of an unreferenced blob writes its content again; if
+that changes the blob's path (other extension or codec) the old file is deleted after the upload commits.
+
+With STORAGE_COMPRESSION set, new blobs are stored compressed when that pays
+off (see storage_compression.py).
+
+Maintenance (from backend/app):
+    python blob_store.py report          # storage saved by deduplication and compression
+    python blob_store.py gc              # delete unreferenced blobs
+    python blob_store.py import-legacy   # move per-vendor files into the store
+    python blob_store.py compress        # compress existing blobs (STORAGE_COMPRESSION or --codec)
+"""
+import argparse
+import os
+import shutil
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Tuple
+from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import case, delete, func, literal, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import DocumentBlob, VendorDocument
+from previews import variant_paths
+from utils import (
+    UPLOAD_DIR, StoredFile, stage_stream, hash_upload, gather_bounded, discard_staged_file, discard_staged_files, delete_file
+)
+from storage_compression import (
+    STORAGE_CODEC, COMPRESSION_SUFFIXES, codec_of, should_compress, worth_keeping, compress_file
+)
+
+BLOB_DIR = os.path.join(UPLOAD_DIR, "blobs")
+GC_GRACE_SECONDS = 3600  # Unreferenced blobs are kept this long before deletion
+
+def blob_path(checksum: str, extension: str = "") -> str:
+    return os.path.join(BLOB_DIR, checksum[:2], f"{checksum}{extension.lower()}")
+
+def is_blob_path(path: str) -> bool:
+    return os.path.abspath(path).startswith(os.path.abspath(BLOB_DIR) + os.sep)
+
+# Stage one new blob, compressed if the codec is on and it saves enough
+async def _stage_blob(file: UploadFile, checksum: str, extension: str, label: str) -> StoredFile:
+    if should_compress(extension):
+        path = blob_path(checksum, extension) + COMPRESSION_SUFFIXES[STORAGE_CODEC]
+        stored = await stage_stream(file, path, label, STORAGE_CODEC)
+        if worth_keeping(stored.size, stored.stored_size):
+            return stored
+        await run_in_threadpool(discard_staged_file, stored)
+        await file.seek(0)
+    return await stage_stream(file, blob_path(checksum, extension), label)
+
+# Stage uploads into the blob store
+async def stage_blobs(db: AsyncSession, uploads: Dict[str, Tuple[UploadFile, str]]) -> Dict[str, StoredFile]:
+    """
+    Hash every upload (key -> (file, label)) concurrently, look all digests up
+    in one query and only write content the store does not have yet.
+    Known content comes back with temp_path=None (no disk write); new content
+    is staged next to its blob path and must be promoted after commit.
+    All or nothing: on failure nothing is left on disk and the error is raised.
+    """
+    keys = list(uploads)
+    hashed = await gather_bounded(hash_upload(file, label) for file, label in uploads.values())
+    for result in hashed:
+        if isinstance(result, BaseException):
+            raise result
+    digests = dict(zip(keys, hashed))
+    
+    # Only blobs that are still referenced are reused; unreferenced ones may be
+    # collected at any moment, so their content is written again
+    checksums = {checksum for checksum, _ in digests.values()}
+    known = {}
+    if checksums:
+        rows = await db.execute(
+            select(DocumentBlob.checksum, DocumentBlob.path)
+            .where(DocumentBlob.checksum.in_(checksums), DocumentBlob.ref_count > 0)
+        )
+        known = dict(rows.all())
+        known = await run_in_threadpool(lambda: {c: p for c, p in known.items() if os.path.exists(p)})
+    
+    # One write per new content, even if several documents share it
+    writes = {}
+    for key, (checksum, _) in digests.items():
+        if checksum not in known and checksum not in writes:
+            file, label = uploads[key]
+            extension = os.path.splitext(file.filename or "")[1]
+            writes[checksum] = _stage_blob(file, checksum, extension, label)
+    
+    results = await gather_bounded(writes.values())
+    written = {checksum: result for checksum, result in zip(writes, results) if isinstance(result, StoredFile)}
+    errors = [result for result in results if isinstance(result, BaseException)]
+    if errors:
+        await run_in_threadpool(discard_staged_files, written.values())
+        raise errors[0]
+    
+    # The first document with new content carries the temp file to promote
+    staged = {}
+    for key, (checksum, size) in digests.items():
+        if checksum in written and written[checksum] not in staged.values():
+            staged[key] = written[checksum]
+        else:
+            path = known.get(checksum) or written[checksum].path
+            staged[key] = StoredFile(path=path, size=size, checksum=checksum)
+    return staged
+
+# Apply reference count changes inside the caller's transaction
+async def adjust_blob_refs(db: AsyncSession, deltas: Counter, blobs: Dict[str, StoredFile]) -> Tuple[Dict[str, str], List[str]]:
+    """
+    deltas: checksum -> change in references. Blobs gaining references are
+    upserted from `blobs` (checksum -> StoredFile) if they have no row yet.
+    Returns (checksum -> current path of each blob in `blobs` that gains or
+    keeps references, files of unreferenced blobs replaced by a new write -
+    delete them after commit).
+    """
+    dialect = db.bind.dialect.name
+    paths = {}
+    replaced = []
+    for checksum, delta in deltas.items():
+        if not delta:
+            if checksum in blobs:
+                # The reference moves between documents: still read the path through the row lock
+                result = await db.execute(
+                    update(DocumentBlob).where(DocumentBlob.checksum == checksum)
+                    .values(updated_at=func.now()).returning(DocumentBlob.path)
+                )
+                paths[checksum] = result.scalar_one_or_none() or blobs[checksum].path
+            continue
+        if delta > 0 and dialect in ("sqlite", "postgresql"):
+            stored = blobs[checksum]
+            previous = (await db.execute(select(DocumentBlob.path).where(DocumentBlob.checksum == checksum))).first()
+            missing = previous is not None and not await run_in_threadpool(os.path.exists, previous.path)
+            insert_stmt = (sqlite.insert if dialect == "sqlite" else postgresql.insert)(DocumentBlob).values(
+                checksum=checksum, path=stored.path, size=stored.size, stored_size=stored.stored_size, ref_count=delta
+            )
+            # An unreferenced (or lost) blob was written again, maybe now compressed: adopt the new file
+            rewritten = or_(DocumentBlob.ref_count <= 0, literal(missing))
+            result = await db.execute(insert_stmt.on_conflict_do_update(
+                index_elements=[DocumentBlob.checksum],
+                set_={
+                    "ref_count": DocumentBlob.ref_count + delta,
+                    "path": case((rewritten, insert_stmt.excluded.path), else_=DocumentBlob.path),
+                    "stored_size": case((rewritten, insert_stmt.excluded.stored_size), else_=DocumentBlob.stored_size),
+                    "updated_at": func.now(),
+                },
+            ).returning(DocumentBlob.path))
+            paths[checksum] = result.scalar_one()
+            if previous is not None and previous.path != paths[checksum]:
+                # e.g. re-uploaded with another extension: nothing references the old file
+                replaced.extend([previous.path, *variant_paths(previous.path)])
+        else:
+            result = await db.execute(
+                update(DocumentBlob)
+                .where(DocumentBlob.checksum == checksum)
+                .values(ref_count=DocumentBlob.ref_count + delta, updated_at=func.now())
+            )
+            if delta > 0 and not result.rowcount:
+                stored = blobs[checksum]
+                db.add(DocumentBlob(checksum=checksum, path=stored.path, size=stored.size,
+                                    stored_size=stored.stored_size, ref_count=delta))
+                paths[checksum] = stored.path
+            elif delta > 0:
+                paths[checksum] = (await db.execute(
+                    select(DocumentBlob.path).where(DocumentBlob.checksum == checksum)
+                )).scalar_one()
+    return paths, replaced
+
+# Storage report
+def storage_report(conn) -> dict:
+    """Bytes referenced by vendor documents vs. bytes actually stored"""
+    documents, logical_bytes = conn.execute(
+        select(func.count(), func.coalesce(func.sum(VendorDocument.size), 0))
+    ).one()
+    blobs, blob_bytes, disk_bytes, compressed_blobs = conn.execute(
+        select(
+            func.count(),
+            func.coalesce(func.sum(DocumentBlob.size), 0),
+            func.coalesce(func.sum(func.coalesce(DocumentBlob.stored_size, DocumentBlob.size)), 0),
+            func.count(DocumentBlob.stored_size),
+        ).where(DocumentBlob.ref_count > 0)
+    ).one()
+    # Documents not in the blob store yet (uploaded before it existed)
+    legacy_documents, legacy_bytes = conn.execute(
+        select(func.count(), func.coalesce(func.sum(VendorDocument.size), 0))
+        .select_from(VendorDocument)
+        .outerjoin(DocumentBlob, DocumentBlob.checksum == VendorDocument.checksum)
+        .where(DocumentBlob.checksum.is_(None))
+    ).one()
+    stored_bytes = blob_bytes + legacy_bytes
+    disk_bytes += legacy_bytes
+    return {
+        "documents": documents,
+        "blobs": blobs,
+        "legacy_documents": legacy_documents,
+        "compressed_blobs": compressed_blobs,
+        "logical_bytes": logical_bytes,
+        "stored_bytes": stored_bytes,
+        "disk_bytes": disk_bytes,  # After compression
+        "saved_bytes": logical_bytes - disk_bytes,
+        "dedup_ratio": round(logical_bytes / stored_bytes, 3) if stored_bytes else 1.0,
+        "compression_ratio": round(stored_bytes / disk_bytes, 3) if disk_bytes else 1.0,
+    }
+
+# Delete blobs nobody references any more
+def collect_garbage(bind, grace_seconds: int = GC_GRACE_SECONDS) -> int:
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=grace_seconds)
+    with bind.connect() as conn:
+        rows = conn.execute(
+            select(DocumentBlob.checksum, DocumentBlob.path)
+            .where(DocumentBlob.ref_count <= 0, DocumentBlob.updated_at < cutoff)
+        ).all()
+    removed = 0
+    for checksum, path in rows:
+        try:
+            with bind.begin() as conn:
+                # Re-checked in the DELETE so a blob that just got a new reference (or file) survives
+                deleted = conn.execute(
+                    delete(DocumentBlob).where(
+                        DocumentBlob.checksum == checksum, DocumentBlob.path == path,
+                        DocumentBlob.ref_count <= 0, DocumentBlob.updated_at < cutoff,
+                    )
+                ).rowcount
+                if not deleted:
+                    continue
+                # Unlink before the delete commits: an upload writing this content again
+                # commits after us and only then moves its file into place
+                for file_path in (*variant_paths(path), path):
+                    _unlink(file_path)
+        except OSError as e:
+            print(f"⚠️  Kept blob {checksum}: {e}")
+            continue
+        removed += 1
+    return removed
+
+def _unlink(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+def _link_or_copy(source: str, target: str):
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copyfile(source, target)
+        os.chmod(target, 0o644)
+
+# Move documents stored per vendor folder into the blob store
+def import_legacy_documents(bind, batch_size: int = 200) -> int:
+    """
+    Files are hashed and linked (or copied) into the store before each batch
+    opens its transaction, which then only updates rows - uploads are not
+    held up behind the file I/O.
+    """
+    from documents import _file_stats
+    
+    moved = 0
+    with bind.connect() as conn:
+        documents = [
+            (document_id, path) for document_id, path in conn.execute(select(VendorDocument.id, VendorDocument.path))
+            if not is_blob_path(path)
+        ]
+    for start in range(0, len(documents), batch_size):
+        batch = [(document_id, path) for document_id, path in documents[start:start + batch_size] if os.path.isfile(path)]
+        hashed = [(document_id, path, *_file_stats(path)) for document_id, path in batch]
+        with bind.connect() as conn:
+            known = dict(conn.execute(
+                select(DocumentBlob.checksum, DocumentBlob.path)
+                .where(DocumentBlob.checksum.in_({checksum for *_, checksum in hashed}))
+            ).all())
+        
+        prepared = []
+        created = set()
+        for document_id, path, size, checksum in hashed:
+            target = known.get(checksum)
+            if not target or not os.path.exists(target):
+                target = blob_path(checksum, os.path.splitext(path)[1])
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                if not os.path.exists(target):
+                    _link_or_copy(path, target)
+                    created.add(target)
+            prepared.append((document_id, path, size, checksum, target))
+        
+        used = set()
+        imported = []
+        with bind.begin() as conn:
+            for document_id, path, size, checksum, target in prepared:
+                existing = conn.execute(select(DocumentBlob.path).where(DocumentBlob.checksum == checksum)).first()
+                # The blob may have moved since (e.g. compressed); use its file while it exists
+                if existing and existing.path != target and os.path.exists(existing.path):
+                    target = existing.path
+                # Documents replaced meanwhile keep their new file
+                if not conn.execute(
+                    update(VendorDocument)
+                    .where(VendorDocument.id == document_id, VendorDocument.path == path)
+                    .values(path=target, size=size, checksum=checksum)
+                ).rowcount:
+                    continue
+                if existing:
+                    conn.execute(update(DocumentBlob).where(DocumentBlob.checksum == checksum)
+                                 .values(path=target, ref_count=DocumentBlob.ref_count + 1, updated_at=func.now()))
+                else:
+                    conn.execute(DocumentBlob.__table__.insert().values(
+                        checksum=checksum, path=target, size=size, ref_count=1))
+                used.add(target)
+                imported.append(path)
+        # Only drop the per-vendor files once the batch is committed
+        for path in imported:
+            delete_file(path)
+        for target in created - used:
+            delete_file(target)
+        moved += len(imported)
+    return moved
+
+# Compress existing blobs in place (backfill for STORAGE_COMPRESSION)
+def compress_blobs(bind, codec: str, batch_size: int = 200) -> dict:
+    """
+    Every referenced, uncompressed blob with a compressible extension is
+    compressed next to itself; blobs that do not shrink enough get
+    stored_size = size so they are not tried again. The new path is
+    committed before the old file is removed.
+    """
+    stats = {"checked": 0, "compressed": 0, "bytes_before": 0, "bytes_after": 0, "cpu_seconds": 0.0}
+    last_checksum = ""
+    while True:
+        with bind.connect() as conn:
+            batch = conn.execute(
+                select(DocumentBlob.checksum, DocumentBlob.path, DocumentBlob.size)
+                .where(DocumentBlob.checksum > last_checksum, DocumentBlob.ref_count > 0,
+                       DocumentBlob.stored_size.is_(None))
+                .order_by(DocumentBlob.checksum)
+                .limit(batch_size)
+            ).all()
+        if not batch:
+            break
+        last_checksum = batch[-1].checksum
+        
+        for checksum, path, size in batch:
+            if codec_of(path) or not should_compress(os.path.splitext(path)[1], codec) or not os.path.isfile(path):
+                continue
+            stats["checked"] += 1
+            target = path + COMPRESSION_SUFFIXES[codec]
+            temp = f"{target}.{os.getpid()}.part"
+            stored_size, cpu_seconds = compress_file(path, temp, codec)
+            stats["cpu_seconds"] += cpu_seconds
+            if not worth_keeping(size, stored_size):
+                os.remove(temp)
+                with bind.begin() as conn:
+                    conn.execute(update(DocumentBlob).where(DocumentBlob.checksum == checksum).values(stored_size=size))
+                continue
+            
+            os.replace(temp, target)
+            with bind.begin() as conn:
+                conn.execute(update(DocumentBlob).where(DocumentBlob.checksum == checksum)
+                             .values(path=target, stored_size=stored_size))
+                conn.execute(update(VendorDocument).where(VendorDocument.path == path).values(path=target))
+            # Uploads take a document's path from the blob row in the statement that adds the
+            # reference (adjust_blob_refs), which waits for this commit: none can still write `path`
+            delete_file(path)
+            stats["compressed"] += 1
+            stats["bytes_before"] += size
+            stats["bytes_after"] += stored_size
+    stats["cpu_seconds"] = round(stats["cpu_seconds"], 3)
+    stats["ratio"] = round(stats["bytes_before"] / stats["bytes_after"], 3) if stats["bytes_after"] else 1.0
+    return stats
+
+if __name__ == "__main__":
+    from database import engine
+    
+    parser = argparse.ArgumentParser(description="Document blob store maintenance")
+    parser.add_argument("command", choices=["report", "gc", "import-legacy", "compress"])
+    parser.add_argument("--codec", choices=list(COMPRESSION_SUFFIXES), help="compress: default STORAGE_COMPRESSION")
+    args = parser.parse_args()
+    
+    if args.command == "report":
+        with engine.connect() as conn:
+            for key, value in storage_report(conn).items():
+                print(f"{key:18s} {value}")
+    elif args.command == "gc":
+        print(f"Removed {collect_garbage(engine)} unreferenced blobs")
+    elif args.command == "compress":
+        codec = args.codec or STORAGE_CODEC
+        if not codec:
+            parser.error("set STORAGE_COMPRESSION or pass --codec")
+        for key, value in compress_blobs(engine, codec).items():
+            print(f"{key:18s} {value}")
+    else:
+        print(f"Moved {import_legacy_documents(engine)} documents into the blob store")
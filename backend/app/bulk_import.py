@@ -0,0 +1,235 @@
+"""
+Bulk vendor import from NDJSON or CSV (one VendorCreate per line/row).
+
+Rows are parsed and validated in a single streaming pass, emails and
+identity numbers (PAN, Aadhaar, GST, phone) are checked against the
+database in chunks, vendor IDs for all valid rows are reserved
+as one block and the vendors are inserted with executemany in batched
+transactions. Every rejected row is reported with its line number.
+
+CLI (from backend/app):
+    python bulk_import.py vendors.ndjson
+    python bulk_import.py vendors.csv --batch-size 2000 --dry-run
+"""
+import argparse
+import asyncio
+import csv
+import io
+import json
+import os
+from typing import BinaryIO, Dict, List, Optional, Tuple
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import Vendor, VendorIdentityKey, VendorStatus
+from schemas import VendorCreate
+from stats import adjust_status_count, stats_cache
+from utils import reserve_vendor_ids
+from identity import (
+    IDENTITY_FIELDS, BLOCKING_IDENTITY_KINDS, identity_keys, identity_key_rows,
+    find_identity_matches, duplicate_identity_message
+)
+
+IMPORT_BATCH_SIZE = 1000
+LOOKUP_CHUNK = 250  # Rows per email/identity lookup; keeps IN (...) lists well below driver parameter limits
+IMPORT_FORMATS = ("ndjson", "csv")
+
+def detect_format(filename: Optional[str]) -> str:
+    extension = os.path.splitext(filename or "")[1].lower()
+    return "csv" if extension == ".csv" else "ndjson"
+
+def _iter_rows(stream: BinaryIO, fmt: str):
+    """Yield (line number, raw dict or error message) without reading the whole file"""
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    try:
+        if fmt == "csv":
+            reader = csv.DictReader(text)
+            for raw in reader:
+                # Empty cells mean "not given", so schema defaults apply
+                yield reader.line_num, {key: value for key, value in raw.items() if key and value not in ("", None)}
+            return
+        for line_number, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                raw = json.loads(line)
+            except ValueError as e:
+                yield line_number, f"Invalid JSON: {e}"
+                continue
+            yield line_number, raw if isinstance(raw, dict) else "Expected a JSON object"
+    finally:
+        text.detach()  # Leave the caller's stream open
+
+def _validation_messages(error: ValidationError) -> List[str]:
+    return [
+        f"{'.'.join(str(part) for part in item['loc']) or 'row'}: {item['msg']}"
+        for item in error.errors()
+    ]
+
+# Parse and validate every row in one pass
+def parse_vendor_rows(stream: BinaryIO, fmt: str) -> Tuple[List[Tuple[int, dict]], List[dict], int]:
+    """
+    Returns (valid rows as (line, VendorCreate data), errors, total rows).
+    Applies the same checks as /api/vendor/register, plus duplicate emails
+    and identity numbers within the file (the first occurrence wins).
+    """
+    valid = []
+    errors = []
+    seen_emails = {}
+    seen_identities = {}
+    total = 0
+    try:
+        for line_number, raw in _iter_rows(stream, fmt):
+            total += 1
+            if isinstance(raw, str):
+                errors.append({"row": line_number, "errors": [raw]})
+                continue
+            try:
+                vendor = VendorCreate.model_validate(raw)
+            except ValidationError as e:
+                errors.append({"row": line_number, "errors": _validation_messages(e)})
+                continue
+            if vendor.age <= 0 or vendor.age > 150:
+                errors.append({"row": line_number, "errors": ["age: Invalid age. Age must be between 1 and 150"]})
+                continue
+            if vendor.email in seen_emails:
+                errors.append({"row": line_number, "errors": [f"email: Duplicate of row {seen_emails[vendor.email]}"]})
+                continue
+            data = vendor.model_dump()
+            keys = identity_keys(data)
+            duplicated = [
+                f"{IDENTITY_FIELDS[kind]}: Duplicate of row {seen_identities[keys[kind]]}"
+                for kind in BLOCKING_IDENTITY_KINDS if keys.get(kind) in seen_identities
+            ]
+            if duplicated:
+                errors.append({"row": line_number, "errors": duplicated})
+                continue
+            seen_emails[vendor.email] = line_number
+            seen_identities.update((key_hash, line_number) for key_hash in keys.values())
+            valid.append((line_number, data))
+    except UnicodeDecodeError as e:
+        errors.append({"row": total + 1, "errors": [f"File is not valid UTF-8: {e}"]})
+    return valid, errors, total
+
+# Drop rows whose email or identity numbers are already registered
+async def filter_registered_vendors(db: AsyncSession, rows: List[Tuple[int, dict]], errors: List[dict]) -> List[Tuple[int, dict]]:
+    registered = set()
+    identity_matches = {}
+    for start in range(0, len(rows), LOOKUP_CHUNK):
+        chunk = [data for _, data in rows[start:start + LOOKUP_CHUNK]]
+        result = await db.execute(select(Vendor.email).where(Vendor.email.in_([data["email"] for data in chunk])))
+        registered.update(result.scalars())
+        key_hashes = [key_hash for data in chunk for key_hash in identity_keys(data).values()]
+        identity_matches.update(await find_identity_matches(db, key_hashes))
+    
+    remaining = []
+    for line_number, data in rows:
+        if data["email"] in registered:
+            errors.append({"row": line_number, "errors": ["email: Email already registered"]})
+            continue
+        message = duplicate_identity_message(identity_keys(data), identity_matches)
+        if message:
+            errors.append({"row": line_number, "errors": [message]})
+            continue
+        remaining.append((line_number, data))
+    return remaining
+
+async def _insert_batch(db: AsyncSession, rows: List[dict]):
+    key_rows = [key_row for values in rows for key_row in identity_key_rows(values["vendor_id"], identity_keys(values))]
+    async with db.bind.begin() as conn:
+        await conn.execute(insert(Vendor.__table__), rows)
+        if key_rows:
+            await conn.execute(insert(VendorIdentityKey.__table__), key_rows)
+        await adjust_status_count(conn, VendorStatus.PENDING, len(rows))
+    stats_cache.clear()
+
+# Insert validated rows in batched executemany transactions
+async def insert_vendor_rows(db: AsyncSession, rows: List[Tuple[int, dict]], errors: List[dict],
+                             batch_size: int = IMPORT_BATCH_SIZE) -> List[dict]:
+    """
+    Reserve one block of vendor IDs and insert `batch_size` vendors per
+    transaction. A batch that hits a constraint (e.g. an email registered
+    meanwhile) is retried row by row so only the offending rows fail. Any
+    other database error fails just that batch: earlier batches are already
+    committed, so its rows are reported as errors and the import goes on.
+    Returns [{"row", "vendor_id"}] for the created vendors.
+    """
+    if not rows:
+        return []
+    vendor_ids = await reserve_vendor_ids(db, len(rows))
+    
+    created = []
+    for start in range(0, len(rows), batch_size):
+        batch = [
+            (line_number, {**data, "vendor_id": vendor_id, "status": VendorStatus.PENDING})
+            for (line_number, data), vendor_id in zip(rows[start:start + batch_size], vendor_ids[start:start + batch_size])
+        ]
+        try:
+            await _insert_batch(db, [values for _, values in batch])
+            created.extend({"row": line_number, "vendor_id": values["vendor_id"]} for line_number, values in batch)
+            continue
+        except IntegrityError:
+            pass
+        except SQLAlchemyError as e:
+            errors.extend({"row": line_number, "errors": [f"Not imported: {_database_error(e)}"]} for line_number, _ in batch)
+            continue
+        for line_number, values in batch:
+            try:
+                await _insert_batch(db, [values])
+                created.append({"row": line_number, "vendor_id": values["vendor_id"]})
+            except IntegrityError as e:
+                errors.append({"row": line_number, "errors": [f"Rejected by the database: {e.orig}"]})
+            except SQLAlchemyError as e:
+                errors.append({"row": line_number, "errors": [f"Not imported: {_database_error(e)}"]})
+    return created
+
+def _database_error(error: SQLAlchemyError) -> str:
+    return str(getattr(error, "orig", None) or error)
+
+# Full import: validate, check emails, insert
+async def import_vendors(db: AsyncSession, stream: BinaryIO, fmt: str,
+                         batch_size: int = IMPORT_BATCH_SIZE, dry_run: bool = False) -> Dict:
+    if fmt not in IMPORT_FORMATS:
+        raise ValueError(f"Unsupported format {fmt!r}, expected one of {', '.join(IMPORT_FORMATS)}")
+    
+    # Parsing and validation are CPU bound; keep them off the event loop
+    valid, errors, total = await run_in_threadpool(parse_vendor_rows, stream, fmt)
+    valid = await filter_registered_vendors(db, valid, errors)
+    await db.rollback()  # End the read transaction; batches commit on their own connections
+    
+    created = [] if dry_run else await insert_vendor_rows(db, valid, errors, batch_size)
+    errors.sort(key=lambda error: error["row"])
+    return {
+        "total_rows": total,
+        "valid_rows": len(valid),
+        "imported": len(created),
+        "failed": len(errors),
+        "dry_run": dry_run,
+        "created": created,
+        "errors": errors,
+    }
+
+async def _main(path: str, fmt: str, batch_size: int, dry_run: bool):
+    from database import AsyncSessionLocal, async_engine
+    
+    async with AsyncSessionLocal() as db:
+        with open(path, "rb") as stream:
+            report = await import_vendors(db, stream, fmt, batch_size, dry_run)
+    await async_engine.dispose()
+    
+    for error in report["errors"]:
+        print(f"row {error['row']}: {'; '.join(error['errors'])}")
+    action = "Validated" if dry_run else "Imported"
+    print(f"{action} {report['valid_rows'] if dry_run else report['imported']} of {report['total_rows']} rows, "
+          f"{report['failed']} failed")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import vendors from NDJSON or CSV")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=IMPORT_FORMATS, help="Default: from the file extension")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    parser.add_argument("--dry-run", action="store_true", help="Validate only, insert nothing")
+    args = parser.parse_args()
+    asyncio.run(_main(args.path, args.format or detect_format(args.path), args.batch_size, args.dry_run))
\ No newline at end of file
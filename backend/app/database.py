@@ -1,18 +1,106 @@
-from sqlalchemy import create_engine
+import os
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
 
-DATABASE_URL = "sqlite:///./vendors.db"  # use PostgreSQL in production
+# Database configuration (override via environment in production)
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./vendors.db")  # use PostgreSQL in production
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+# SQLite tuning
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))  # Wait for locks instead of failing
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))  # Page cache per connection
+
+# PostgreSQL pool sizing (per worker process)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))  # Seconds to wait for a free connection
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # Seconds before a connection is replaced
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "15000"))
+
+# Async driver used by the API for each sync driver
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+}
+
+def async_url(url: str) -> str:
+    """Translate a sync database URL to its asyncio driver equivalent"""
+    parsed = make_url(url)
+    return parsed.set(drivername=ASYNC_DRIVERS.get(parsed.drivername, parsed.drivername)).render_as_string(hide_password=False)
+
+def is_sqlite(url: str) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+# Engine options for a database URL
+def engine_options(url: str, is_async: bool = False) -> dict:
+    """
+    SQLite: no pool tuning needed (file locks serialize writers), pragmas are
+    applied per connection by _apply_sqlite_pragmas.
+    PostgreSQL: sized QueuePool, pre-ping and a server-side statement timeout.
+    """
+    if is_sqlite(url):
+        return {"connect_args": {"check_same_thread": False}}
+    
+    if is_async:
+        connect_args = {"server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}}
+    else:
+        connect_args = {"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"}
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": True,
+        "connect_args": connect_args,
+    }
+
+# Apply SQLite pragmas on every new connection
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")  # Readers no longer block the writer
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute("PRAGMA synchronous=NORMAL")  # Safe with WAL, far fewer fsyncs
+    cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+# Create a sync engine with the profile for its database
+def make_engine(url: str):
+    new_engine = create_engine(url, **engine_options(url))
+    if is_sqlite(url):
+        event.listen(new_engine, "connect", _apply_sqlite_pragmas)
+    return new_engine
+
+# Create an async engine with the profile for its database
+def make_async_engine(url: str):
+    new_engine = create_async_engine(async_url(url), **engine_options(url, is_async=True))
+    if is_sqlite(url):
+        event.listen(new_engine.sync_engine, "connect", _apply_sqlite_pragmas)
+    return new_engine
+
+# Sync engine - startup tasks, seeding and command-line tools
+engine = make_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine - API routes, so queries never block the event loop
+async_engine = make_async_engine(DATABASE_URL)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 # Database dependency
 def get_db():
-    """Database session dependency for FastAPI"""
+    """Sync database session (for scripts and startup tasks)"""
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+# Async database dependency
+async def get_async_db():
+    """Async database session dependency for FastAPI"""
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,94 @@
+"""
+CPU-bound checks run on uploaded documents by the job workers (jobs.py).
+
+Runs in worker processes: keep this module free of database and app imports
+so the (spawned) processes start quickly. Each processor takes the file path
+and document type and returns a JSON-serializable dict; raising an exception
+makes the job retry.
+"""
+import os
+import re
+from typing import Callable, Dict, Optional
+from previews import render_previews
+from storage_compression import codec_of, open_stored, original_path
+
+READ_CHUNK_SIZE = 1024 * 1024
+
+# (leading bytes, MIME type, extensions that may carry it)
+FILE_SIGNATURES = [
+    (b"%PDF-", "application/pdf", {".pdf"}),
+    (b"\xff\xd8\xff", "image/jpeg", {".jpg", ".jpeg"}),
+    (b"\x89PNG\r\n\x1a\n", "image/png", {".png"}),
+    (b"GIF87a", "image/gif", {".gif"}),
+    (b"GIF89a", "image/gif", {".gif"}),
+    (b"BM", "image/bmp", {".bmp"}),
+    (b"II*\x00", "image/tiff", {".tif", ".tiff"}),  # Little-endian TIFF
+    (b"MM\x00*", "image/tiff", {".tif", ".tiff"}),  # Big-endian TIFF
+]
+
+def detect_mime_type(head: bytes) -> Optional[str]:
+    for signature, mime_type, _ in FILE_SIGNATURES:
+        if head.startswith(signature):
+            return mime_type
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+def _extensions_for(mime_type: Optional[str]) -> set:
+    if mime_type == "image/webp":
+        return {".webp"}
+    return {extension for _, signature_type, extensions in FILE_SIGNATURES
+            if signature_type == mime_type for extension in extensions}
+
+# "/Type /Page" objects, but not "/Type /Pages" (the page tree nodes)
+PDF_PAGE_PATTERN = re.compile(rb"/Type\s*/Page(?![A-Za-z])")
+
+def count_pdf_pages(path: str) -> int:
+    """Count page objects while streaming the file (no PDF library needed)"""
+    pages = 0
+    tail = b""
+    with open_stored(path) as f:
+        for chunk in iter(lambda: f.read(READ_CHUNK_SIZE), b""):
+            data = tail + chunk
+            # Matches starting in the last 32 bytes are counted with the next chunk
+            cutoff = max(len(data) - 32, 0)
+            pages += sum(1 for match in PDF_PAGE_PATTERN.finditer(data) if match.start() < cutoff)
+            tail = data[cutoff:]
+    pages += len(PDF_PAGE_PATTERN.findall(tail))
+    return pages
+
+# File type check and page count
+def inspect_document(path: str, doc_type: str) -> dict:
+    with open_stored(path) as f:
+        head = f.read(16)
+        if codec_of(path):
+            size = len(head) + sum(len(chunk) for chunk in iter(lambda: f.read(READ_CHUNK_SIZE), b""))
+        else:
+            size = os.path.getsize(path)
+    mime_type = detect_mime_type(head)
+    extension = os.path.splitext(original_path(path))[1].lower()
+    result = {
+        "doc_type": doc_type,
+        "size": size,
+        "mime_type": mime_type,
+        "allowed_type": mime_type is not None,
+        "extension_matches": extension in _extensions_for(mime_type),
+    }
+    if mime_type == "application/pdf":
+        result["pages"] = count_pdf_pages(path)
+    elif mime_type is not None:
+        result["pages"] = 1
+    return result
+
+# Job kind -> processor; OCR of PAN/Aadhaar numbers would be registered here
+PROCESSORS: Dict[str, Callable[[str, str], dict]] = {
+    "inspect": inspect_document,
+    "preview": render_previews,
+}
+
+# Kinds whose result depends only on the content, so a result for the same
+# checksum can be reused (previews write files that may have been removed since)
+REUSABLE_KINDS = {"inspect"}
+
+def run_processor(kind: str, path: str, doc_type: str) -> dict:
+    return PROCESSORS[kind](path, doc_type)
\ No newline at end of file
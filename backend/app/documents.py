@@ -0,0 +1,86 @@
+import hashlib
+import os
+from typing import Dict, Optional
+from sqlalchemy import Row, inspect, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import Vendor, VendorDocument, DOCUMENT_TYPES
+
+# Documents of one vendor, keyed by doc_type
+async def get_vendor_documents(db: AsyncSession, vendor_id: str) -> Dict[str, VendorDocument]:
+    result = await db.execute(select(VendorDocument).where(VendorDocument.vendor_id == vendor_id))
+    return {document.doc_type: document for document in result.scalars()}
+
+# Path, checksum and size of a single document (indexed point lookup)
+async def get_document_file(db: AsyncSession, vendor_id: str, doc_type: str) -> Optional[Row]:
+    result = await db.execute(
+        select(VendorDocument.path, VendorDocument.checksum, VendorDocument.size).where(
+            VendorDocument.vendor_id == vendor_id, VendorDocument.doc_type == doc_type
+        )
+    )
+    return result.first()
+
+# Build the VendorResponse payload (vendor columns + document paths)
+async def vendor_response(db: AsyncSession, vendor: Vendor) -> dict:
+    data = {column.key: getattr(vendor, column.key) for column in Vendor.__table__.columns}
+    rows = await db.execute(
+        select(VendorDocument.doc_type, VendorDocument.path).where(VendorDocument.vendor_id == vendor.vendor_id)
+    )
+    for doc_type, path in rows:
+        field = DOCUMENT_TYPES.get(doc_type)
+        if field:
+            data[field] = path
+    return data
+
+def _file_stats(path: str):
+    """Size and SHA-256 of a file on disk (None, None if missing)"""
+    if not os.path.isfile(path):
+        return None, None
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return os.path.getsize(path), digest.hexdigest()
+
+# Data migration: per-document columns on vendors -> vendor_documents
+def migrate_legacy_document_columns(conn, batch_size: int = 500):
+    """
+    Move paths from the old vendors.<document> columns into vendor_documents
+    and drop those columns, inside the caller's transaction.
+    Does nothing once the columns are gone.
+    """
+    existing_columns = {column["name"] for column in inspect(conn).get_columns("vendors")}
+    legacy = {doc_type: field for doc_type, field in DOCUMENT_TYPES.items() if field in existing_columns}
+    if not legacy:
+        return
+    
+    already = {
+        (vendor_id, doc_type)
+        for vendor_id, doc_type in conn.execute(select(VendorDocument.vendor_id, VendorDocument.doc_type))
+    }
+    columns = ", ".join(legacy.values())
+    rows = conn.execute(text(f"SELECT vendor_id, {columns} FROM vendors")).mappings().all()
+    
+    moved = 0
+    batch = []
+    for row in rows:
+        for doc_type, field in legacy.items():
+            path = row[field]
+            if not path or (row["vendor_id"], doc_type) in already:
+                continue
+            size, checksum = _file_stats(path)
+            batch.append({
+                "vendor_id": row["vendor_id"], "doc_type": doc_type,
+                "path": path, "size": size, "checksum": checksum,
+            })
+            if len(batch) >= batch_size:
+                conn.execute(insert(VendorDocument), batch)
+                moved += len(batch)
+                batch = []
+    if batch:
+        conn.execute(insert(VendorDocument), batch)
+        moved += len(batch)
+    
+    for field in legacy.values():
+        conn.execute(text(f"ALTER TABLE vendors DROP COLUMN {field}"))
+    
+    print(f"✅ Moved {moved} document paths from vendors into vendor_documents")
\ No newline at end of file
@@ -0,0 +1,156 @@
+"""
+In-process pub/sub hub behind the Server-Sent Events endpoints.
+
+Routes publish after their commit; every open stream of the vendor (and
+every admin stream) gets the event through its own small bounded queue.
+Publishing never waits: a stream whose queue is full is ended and its client
+reconnects with Last-Event-ID, which replays the recent events it missed.
+An idle stream is one suspended coroutine and an empty queue, plus a
+keepalive comment every SSE_KEEPALIVE_SECONDS.
+
+Events only reach streams in the same worker process; with several workers
+each stream still starts with a snapshot of the current state. Streams end
+after SSE_MAX_STREAM_SECONDS (clients reconnect on their own), which also
+bounds how long a graceful server shutdown waits for them.
+"""
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from typing import AsyncIterator, Dict, NamedTuple, Optional, Set
+
+SSE_KEEPALIVE_SECONDS = float(os.getenv("SSE_KEEPALIVE_SECONDS", "15"))
+SSE_MAX_STREAM_SECONDS = float(os.getenv("SSE_MAX_STREAM_SECONDS", "300"))
+SSE_RETRY_MS = 3000  # Reconnect delay suggested to clients
+SSE_QUEUE_SIZE = 100  # Undelivered events per stream before it is dropped
+SSE_REPLAY_SIZE = 1000  # Recent events kept for Last-Event-ID
+ADMIN_TOPIC = "admin"
+
+class ServerEvent(NamedTuple):
+    id: int
+    name: str
+    data: str  # JSON
+    vendor_id: Optional[str]
+    admin: bool
+
+def format_event(name: str, data: str, event_id: Optional[int] = None) -> str:
+    """One SSE message; `data` is already JSON (a single line)"""
+    event_id = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{event_id}event: {name}\ndata: {data}\n\n"
+
+def _vendor_topic(vendor_id: str) -> str:
+    return f"vendor:{vendor_id}"
+
+class EventHub:
+    def __init__(self):
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._recent = deque(maxlen=SSE_REPLAY_SIZE)
+        self._last_id = 0
+        self.dropped = 0
+    
+    # Fan an event out to the vendor's streams and (unless admin=False) the admin streams
+    def publish(self, name: str, data: dict, vendor_id: Optional[str] = None, admin: bool = True):
+        self._last_id += 1
+        event = ServerEvent(self._last_id, name, json.dumps(data, default=str), vendor_id, admin)
+        self._recent.append(event)
+        topics = ([ADMIN_TOPIC] if admin else []) + ([_vendor_topic(vendor_id)] if vendor_id else [])
+        for topic in topics:
+            for queue in list(self._subscribers.get(topic, ())):
+                try:
+                    queue.put_nowait(event)
+                except asyncio.QueueFull:
+                    self._drop(topic, queue)
+    
+    # ID of the newest event; read it before loading a snapshot and stream from there
+    @property
+    def last_event_id(self) -> int:
+        return self._last_id
+    
+    def _drop(self, topic: str, queue: asyncio.Queue):
+        # Too slow to keep up: end its stream, the client resumes from Last-Event-ID
+        self._unsubscribe(topic, queue)
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(None)
+        self.dropped += 1
+    
+    def _subscribe(self, topic: str) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=SSE_QUEUE_SIZE)
+        self._subscribers.setdefault(topic, set()).add(queue)
+        return queue
+    
+    def _unsubscribe(self, topic: str, queue: asyncio.Queue):
+        queues = self._subscribers.get(topic)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[topic]
+    
+    def _matches(self, event: ServerEvent, vendor_id: Optional[str]) -> bool:
+        return event.vendor_id == vendor_id if vendor_id else event.admin
+    
+    # Server-sent event stream for one vendor, or all vendors (admin) when vendor_id is None
+    async def stream(self, vendor_id: Optional[str], snapshot: Optional[tuple] = None,
+                     last_event_id: Optional[int] = None) -> AsyncIterator[str]:
+        """
+        Starts with `snapshot` ((name, data), the current state), then the
+        events missed since `last_event_id`, then live events.
+        """
+        topic = _vendor_topic(vendor_id) if vendor_id else ADMIN_TOPIC
+        # Subscribe first: the queue gets everything after _last_id, the replay everything up to it
+        queue = self._subscribe(topic)
+        replay_until = self._last_id
+        deadline = time.monotonic() + SSE_MAX_STREAM_SECONDS
+        try:
+            yield f"retry: {SSE_RETRY_MS}\n\n"
+            if snapshot:
+                name, data = snapshot
+                yield format_event(name, json.dumps(data, default=str))
+            if last_event_id is not None and last_event_id < replay_until:
+                for event in list(self._recent):
+                    if last_event_id < event.id <= replay_until and self._matches(event, vendor_id):
+                        yield format_event(event.name, event.data, event.id)
+    
+            while True:
+                timeout = min(SSE_KEEPALIVE_SECONDS, deadline - time.monotonic())
+                if timeout <= 0:
+                    return
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if event is None:
+                    return
+                yield format_event(event.name, event.data, event.id)
+        finally:
+            self._unsubscribe(topic, queue)
+    
+    # End every open stream (shutdown)
+    def close(self):
+        for topic, queues in list(self._subscribers.items()):
+            for queue in list(queues):
+                self._drop(topic, queue)
+    
+    def stats(self) -> dict:
+        return {
+            "streams": sum(len(queues) for queues in self._subscribers.values()),
+            "topics": len(self._subscribers),
+            "last_event_id": self._last_id,
+            "dropped": self.dropped,
+        }
+
+event_hub = EventHub()
+
+# Last-Event-ID header value (ignored unless it is one of our numeric IDs)
+def parse_last_event_id(value: Optional[str]) -> Optional[int]:
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",  # Keep nginx from buffering the stream
+}
\ No newline at end of file
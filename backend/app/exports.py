@@ -0,0 +1,155 @@
+import csv
+import io
+import json
+import os
+import time
+import zipfile
+from datetime import datetime
+from enum import Enum
+from typing import AsyncIterator, Iterable, Iterator, List, NamedTuple, Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import Vendor, VendorDocument, VendorStatus
+from pagination import as_utc
+from utils import UPLOAD_CHUNK_SIZE
+from storage_compression import codec_of, open_stored, original_path
+
+# Formats that are already compressed; deflating them again only burns CPU
+PRECOMPRESSED_EXTENSIONS = {
+    ".jpg", ".jpeg", ".png", ".gif", ".webp", ".heic",
+    ".pdf", ".zip", ".gz", ".docx", ".xlsx", ".mp4",
+}
+
+class ExportDocument(NamedTuple):
+    vendor_id: str
+    doc_type: str
+    path: str
+    checksum: str
+
+# Documents of the given vendors, in archive order
+async def get_export_documents(db: AsyncSession, vendor_ids: List[str]) -> List[ExportDocument]:
+    result = await db.execute(
+        select(VendorDocument.vendor_id, VendorDocument.doc_type, VendorDocument.path, VendorDocument.checksum)
+        .where(VendorDocument.vendor_id.in_(vendor_ids))
+        .order_by(VendorDocument.vendor_id, VendorDocument.doc_type)
+    )
+    return [ExportDocument(*row) for row in result]
+
+class _ZipSink:
+    """Write-only, unseekable target: zipfile then streams entries with data descriptors"""
+    
+    def __init__(self):
+        self._chunks = []
+    
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+    
+    def flush(self):
+        pass
+    
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+# Stream a ZIP archive of documents chunk by chunk
+def stream_documents_zip(documents: Iterable[ExportDocument], per_vendor_folders: bool = True) -> Iterator[bytes]:
+    """
+    Yield the archive as it is built: memory stays at about one chunk per
+    file, whatever the bundle size. Files are read in UPLOAD_CHUNK_SIZE
+    pieces; a manifest.csv at the end lists every document and whether it
+    was included. This is a plain generator so Starlette runs it in the
+    threadpool and the file reads stay off the event loop.
+    """
+    return (chunk for chunk in _build_zip(documents, per_vendor_folders) if chunk)
+
+def _build_zip(documents: Iterable[ExportDocument], per_vendor_folders: bool) -> Iterator[bytes]:
+    sink = _ZipSink()
+    manifest = io.StringIO()
+    writer = csv.writer(manifest)
+    writer.writerow(["vendor_id", "doc_type", "file", "size", "sha256", "status"])
+    
+    with zipfile.ZipFile(sink, "w") as archive:
+        for document in documents:
+            extension = os.path.splitext(original_path(document.path))[1].lower()
+            name = f"{document.doc_type}{extension}"
+            if per_vendor_folders:
+                name = f"{document.vendor_id}/{name}"
+            try:
+                source = open_stored(document.path)  # Decompresses documents compressed at rest
+            except OSError:
+                writer.writerow([document.vendor_id, document.doc_type, name, "", document.checksum, "missing"])
+                continue
+    
+            with source:
+                stat_result = os.stat(document.path)
+                info = zipfile.ZipInfo(name, date_time=time.localtime(stat_result.st_mtime)[:6])
+                if not codec_of(document.path):
+                    info.file_size = stat_result.st_size  # Lets zipfile pick ZIP64 up front (uploads are capped anyway)
+                info.compress_type = zipfile.ZIP_STORED if extension in PRECOMPRESSED_EXTENSIONS else zipfile.ZIP_DEFLATED
+                size = 0
+                with archive.open(info, "w") as entry:
+                    for chunk in iter(lambda: source.read(UPLOAD_CHUNK_SIZE), b""):
+                        entry.write(chunk)
+                        size += len(chunk)
+                        yield sink.drain()
+            yield sink.drain()
+            writer.writerow([document.vendor_id, document.doc_type, name, size, document.checksum, "included"])
+    
+        archive.writestr("manifest.csv", manifest.getvalue(), compress_type=zipfile.ZIP_DEFLATED)
+    yield sink.drain()
+
+# Rows fetched (and written out) per round trip in vendor exports
+EXPORT_BATCH_SIZE = 1000
+EXPORT_FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+# Query for a vendor export (oldest first, served by the created_at indexes)
+def vendor_export_query(fields: List[str], status_filter: Optional[VendorStatus] = None,
+                        created_from: Optional[datetime] = None, created_to: Optional[datetime] = None):
+    query = select(*[getattr(Vendor, name) for name in fields])
+    if status_filter:
+        query = query.where(Vendor.status == status_filter)
+    if created_from:
+        query = query.where(Vendor.created_at >= as_utc(created_from))
+    if created_to:
+        query = query.where(Vendor.created_at < as_utc(created_to))
+    return query.order_by(Vendor.created_at, Vendor.id)
+
+def _export_value(value):
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+# Stream vendors as CSV or NDJSON while they are read
+async def stream_vendor_export(session_factory, query, fields: List[str], fmt: str) -> AsyncIterator[str]:
+    """
+    Rows come from a streaming result (a server-side cursor where the driver
+    has one) EXPORT_BATCH_SIZE at a time, and each batch is written out
+    before the next is fetched, so memory stays flat for any table size.
+    The generator opens its own session because it runs after the endpoint
+    has returned.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if fmt == "csv":
+        writer.writerow(fields)
+    
+    async with session_factory() as db:
+        result = await db.stream(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        async for rows in result.partitions():
+            for row in rows:
+                values = [_export_value(value) for value in row]
+                if fmt == "csv":
+                    writer.writerow(values)
+                else:
+                    buffer.write(json.dumps(dict(zip(fields, values)), ensure_ascii=False))
+                    buffer.write("\n")
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    
+    if buffer.tell():
+        yield buffer.getvalue()
\ No newline at end of file
@@ -0,0 +1,165 @@
+"""
+Duplicate identity detection for vendors.
+
+PAN, Aadhaar, GST number and phone are normalized (case, spaces, dashes,
+country code) and stored as keyed HMAC-SHA256 lookup keys in
+vendor_identity_keys, so the raw numbers are never needed to find a match.
+Registration checks all keys of a new vendor with one indexed query, and
+duplicate clusters come from a single GROUP BY over the key index.
+
+IDENTITY_HASH_KEY must stay the same for the keys to keep matching; after
+changing it, rebuild the table (from backend/app):
+    python identity.py rebuild
+"""
+import argparse
+import hashlib
+import hmac
+import os
+import re
+from typing import Dict, List, Optional
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import Vendor, VendorIdentityKey
+
+IDENTITY_HASH_KEY = os.getenv("IDENTITY_HASH_KEY", "change-this-identity-hash-key").encode()
+
+# kind -> Vendor column
+IDENTITY_FIELDS = {
+    "pan": "pan_number",
+    "aadhaar": "aadhaar_number",
+    "gst": "gst_number",
+    "phone": "phone",
+}
+IDENTITY_LABELS = {
+    "pan": "PAN",
+    "aadhaar": "Aadhaar number",
+    "gst": "GST number",
+    "phone": "Phone number",
+}
+# Kinds that block a new registration (comma-separated, default: all)
+BLOCKING_IDENTITY_KINDS = [
+    kind.strip() for kind in os.getenv("BLOCKING_IDENTITY_KINDS", ",".join(IDENTITY_FIELDS)).split(",")
+    if kind.strip() in IDENTITY_FIELDS
+]
+BACKFILL_BATCH_SIZE = 1000
+
+def normalize_identity(kind: str, value: Optional[str]) -> Optional[str]:
+    """Canonical form of an identity value, or None if there is nothing to compare"""
+    if not value:
+        return None
+    if kind in ("aadhaar", "phone"):
+        digits = re.sub(r"\D", "", value)
+        if kind == "phone" and len(digits) > 10 and (digits.startswith("91") or digits.startswith("0")):
+            digits = digits[-10:]  # +91 98765 43210 / 098765 43210 -> 9876543210
+        return digits or None
+    return re.sub(r"[^0-9A-Z]", "", value.upper()) or None
+
+def identity_hash(kind: str, normalized: str) -> str:
+    return hmac.new(IDENTITY_HASH_KEY, f"{kind}:{normalized}".encode(), hashlib.sha256).hexdigest()
+
+# Lookup keys of one vendor's data (a dict of Vendor columns)
+def identity_keys(data: dict) -> Dict[str, str]:
+    keys = {}
+    for kind, field in IDENTITY_FIELDS.items():
+        normalized = normalize_identity(kind, data.get(field))
+        if normalized:
+            keys[kind] = identity_hash(kind, normalized)
+    return keys
+
+def identity_key_rows(vendor_id: str, keys: Dict[str, str]) -> List[dict]:
+    return [{"vendor_id": vendor_id, "kind": kind, "key_hash": key_hash} for kind, key_hash in keys.items()]
+
+# Registered vendors sharing any of the given keys, in one indexed query
+async def find_identity_matches(db: AsyncSession, key_hashes: List[str]) -> Dict[str, str]:
+    """Returns key_hash -> vendor_id (the earliest vendor with that key)"""
+    if not key_hashes:
+        return {}
+    result = await db.execute(
+        select(VendorIdentityKey.key_hash, func.min(VendorIdentityKey.vendor_id))
+        .where(VendorIdentityKey.key_hash.in_(key_hashes))
+        .group_by(VendorIdentityKey.key_hash)
+    )
+    return dict(result.all())
+
+# Error message for a registration that reuses blocking identity fields
+def duplicate_identity_message(keys: Dict[str, str], matches: Dict[str, str]) -> Optional[str]:
+    duplicated = [IDENTITY_LABELS[kind] for kind in BLOCKING_IDENTITY_KINDS if keys.get(kind) in matches]
+    if not duplicated:
+        return None
+    return f"{', '.join(duplicated)} already registered"
+
+# Clusters of vendors that share an identity key
+async def duplicate_clusters(db: AsyncSession, kind: Optional[str], after: Optional[str], limit: int):
+    """
+    One GROUP BY pass over the key index finds the keys used by more than
+    one vendor (`limit` of them, ordered by key after `after`); a second
+    query loads the vendors of just those keys.
+    Returns (clusters, last key_hash or None when there are no more).
+    """
+    duplicated = (
+        select(VendorIdentityKey.key_hash, VendorIdentityKey.kind)
+        .group_by(VendorIdentityKey.key_hash, VendorIdentityKey.kind)
+        .having(func.count(func.distinct(VendorIdentityKey.vendor_id)) > 1)
+        .order_by(VendorIdentityKey.key_hash)
+        .limit(limit + 1)
+    )
+    if kind:
+        duplicated = duplicated.where(VendorIdentityKey.kind == kind)
+    if after:
+        duplicated = duplicated.where(VendorIdentityKey.key_hash > after)
+    groups = (await db.execute(duplicated)).all()
+    more = len(groups) > limit
+    groups = groups[:limit]
+    if not groups:
+        return [], None
+    
+    rows = await db.execute(
+        select(VendorIdentityKey.key_hash, Vendor.vendor_id, Vendor.name, Vendor.business_name,
+               Vendor.status, Vendor.created_at)
+        .join(Vendor, Vendor.vendor_id == VendorIdentityKey.vendor_id)
+        .where(VendorIdentityKey.key_hash.in_([key_hash for key_hash, _ in groups]))
+        .order_by(VendorIdentityKey.key_hash, Vendor.created_at, Vendor.id)
+    )
+    vendors = {}
+    for key_hash, *vendor in rows:
+        vendors.setdefault(key_hash, []).append(dict(zip(
+            ("vendor_id", "name", "business_name", "status", "created_at"), vendor
+        )))
+    
+    clusters = [
+        {"kind": kind, "label": IDENTITY_LABELS.get(kind, kind), "vendors": vendors.get(key_hash, [])}
+        for key_hash, kind in groups
+    ]
+    return clusters, groups[-1].key_hash if more else None
+
+# Fill vendor_identity_keys for existing vendors (migration 0004 / rebuild)
+def backfill_identity_keys(conn, batch_size: int = BACKFILL_BATCH_SIZE, rebuild: bool = False):
+    """Keyset-paginated pass over vendors, inside the caller's transaction"""
+    if rebuild:
+        conn.execute(delete(VendorIdentityKey))
+    columns = [getattr(Vendor, field) for field in IDENTITY_FIELDS.values()]
+    last_id = 0
+    while True:
+        batch = conn.execute(
+            select(Vendor.id, Vendor.vendor_id, *columns)
+            .where(Vendor.id > last_id)
+            .order_by(Vendor.id)
+            .limit(batch_size)
+        ).mappings().all()
+        if not batch:
+            break
+        rows = [key_row for vendor in batch for key_row in identity_key_rows(vendor["vendor_id"], identity_keys(vendor))]
+        if rows:
+            conn.execute(insert(VendorIdentityKey), rows)
+        last_id = batch[-1]["id"]
+
+if __name__ == "__main__":
+    from database import engine
+    
+    parser = argparse.ArgumentParser(description="Vendor identity lookup keys")
+    parser.add_argument("command", choices=["rebuild"], help="rebuild: recompute all keys (e.g. after changing IDENTITY_HASH_KEY)")
+    parser.parse_args()
+    
+    with engine.begin() as conn:
+        backfill_identity_keys(conn, rebuild=True)
+    print("✅ Rebuilt vendor identity keys")
\ No newline at end of file
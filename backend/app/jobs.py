@@ -0,0 +1,240 @@
+"""
+Database-backed job queue for post-upload document processing.
+
+upload_documents queues one job per new document in its own transaction and
+returns; a dispatcher claims queued jobs (guarded UPDATE, so several app
+workers or standalone workers never run the same job) and runs them on a
+process pool. Failed jobs are retried with exponential backoff up to
+JOB_MAX_ATTEMPTS; a job whose worker died is reclaimed once its lease expires.
+
+The dispatcher runs inside the API process when JOB_WORKERS > 0. To run the
+processing elsewhere, start the API with JOB_WORKERS=0 and run (from
+backend/app):
+    python jobs.py
+"""
+import asyncio
+import json
+import os
+import signal
+import socket
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta, timezone
+from multiprocessing import get_context
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import AsyncSessionLocal, async_engine
+from models import DocumentJob, JobStatus
+from document_checks import PROCESSORS, REUSABLE_KINDS, run_processor
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))  # Processes; 0 = no dispatcher in this process
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_RETRY_BASE_SECONDS = int(os.getenv("JOB_RETRY_BASE_SECONDS", "30"))  # 30s, 60s, 120s, ...
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "5"))  # Fallback when nothing wakes the dispatcher
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "600"))
+JOB_SHUTDOWN_TIMEOUT = float(os.getenv("JOB_SHUTDOWN_TIMEOUT", "10"))
+JOB_KINDS = list(PROCESSORS)
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+# Queue processing for new or replaced documents (in the caller's transaction)
+async def enqueue_document_jobs(db: AsyncSession, vendor_id: str, documents: List[Tuple[str, str, Optional[str]]]):
+    """
+    documents: (doc_type, path, checksum). Content already inspected for
+    another upload of the same document type (same checksum) reuses that
+    result instead of queueing the work again.
+    """
+    checksums = {checksum for _, _, checksum in documents if checksum}
+    processed = {}
+    if checksums:
+        rows = await db.execute(
+            select(DocumentJob.checksum, DocumentJob.doc_type, DocumentJob.kind, DocumentJob.result)
+            .where(DocumentJob.checksum.in_(checksums), DocumentJob.status == JobStatus.DONE)
+        )
+        processed = {(checksum, doc_type, kind): result for checksum, doc_type, kind, result in rows}
+    
+    for doc_type, path, checksum in documents:
+        for kind in JOB_KINDS:
+            result = processed.get((checksum, doc_type, kind)) if kind in REUSABLE_KINDS else None
+            db.add(DocumentJob(
+                vendor_id=vendor_id, doc_type=doc_type, checksum=checksum, path=path, kind=kind,
+                status=JobStatus.DONE if result is not None else JobStatus.QUEUED,
+                result=result,
+            ))
+
+def _claimable(now: datetime):
+    return or_(
+        and_(DocumentJob.status == JobStatus.QUEUED, DocumentJob.run_after <= now),
+        and_(DocumentJob.status == JobStatus.RUNNING, DocumentJob.locked_at < now - timedelta(seconds=JOB_LEASE_SECONDS)),
+    )
+
+# Claim up to `limit` runnable jobs for this worker
+async def claim_jobs(worker_id: str, limit: int) -> List:
+    now = _now()
+    async with AsyncSessionLocal() as db:
+        candidates = await db.execute(
+            select(DocumentJob.id).where(_claimable(now)).order_by(DocumentJob.id).limit(limit)
+        )
+        claimed = []
+        for job_id in candidates.scalars().all():
+            # Re-checked in the UPDATE: a job claimed meanwhile by another worker is skipped
+            result = await db.execute(
+                update(DocumentJob)
+                .where(DocumentJob.id == job_id, _claimable(now))
+                .values(status=JobStatus.RUNNING, locked_by=worker_id, locked_at=now,
+                        attempts=DocumentJob.attempts + 1)
+                .returning(DocumentJob.id, DocumentJob.kind, DocumentJob.path, DocumentJob.doc_type, DocumentJob.attempts)
+            )
+            job = result.first()
+            if job:
+                claimed.append(job)
+        await db.commit()
+    return claimed
+
+async def _update_job(job_id: int, worker_id: str, **values):
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(DocumentJob)
+            .where(DocumentJob.id == job_id, DocumentJob.locked_by == worker_id)
+            .values(**values)
+        )
+        await db.commit()
+
+async def complete_job(job_id: int, worker_id: str, result: dict):
+    await _update_job(job_id, worker_id, status=JobStatus.DONE, result=json.dumps(result),
+                      last_error=None, locked_by=None, locked_at=None)
+
+async def fail_job(job_id: int, worker_id: str, attempts: int, error: str):
+    if attempts >= JOB_MAX_ATTEMPTS:
+        await _update_job(job_id, worker_id, status=JobStatus.FAILED, last_error=error, locked_by=None, locked_at=None)
+    else:
+        retry_at = _now() + timedelta(seconds=JOB_RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+        await _update_job(job_id, worker_id, status=JobStatus.QUEUED, run_after=retry_at, last_error=error,
+                          locked_by=None, locked_at=None)
+
+# Give a job back without counting the attempt (shutdown)
+async def release_job(job_id: int, worker_id: str):
+    await _update_job(job_id, worker_id, status=JobStatus.QUEUED, attempts=DocumentJob.attempts - 1,
+                      locked_by=None, locked_at=None)
+
+# Jobs of one vendor, newest first
+async def get_vendor_jobs(db: AsyncSession, vendor_id: str, doc_type: Optional[str] = None) -> List[dict]:
+    query = select(DocumentJob).where(DocumentJob.vendor_id == vendor_id)
+    if doc_type:
+        query = query.where(DocumentJob.doc_type == doc_type)
+    result = await db.execute(query.order_by(DocumentJob.id.desc()))
+    return [
+        {
+            "id": job.id, "doc_type": job.doc_type, "kind": job.kind, "checksum": job.checksum,
+            "status": job.status, "attempts": job.attempts, "last_error": job.last_error,
+            "result": json.loads(job.result) if job.result else None,
+            "created_at": job.created_at, "updated_at": job.updated_at,
+        }
+        for job in result.scalars()
+    ]
+
+# Claims jobs and runs them on a process pool
+class JobDispatcher:
+    def __init__(self, workers: int = JOB_WORKERS):
+        self.workers = workers
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._loop_task: Optional[asyncio.Task] = None
+        self._running: Dict[int, asyncio.Task] = {}
+        self._wake = asyncio.Event()
+        self._stopping = False
+    
+    def start(self):
+        if self.workers <= 0 or self._loop_task:
+            return
+        self._executor = self._new_executor()
+        self._stopping = False
+        self._wake = asyncio.Event()
+        self._loop_task = asyncio.create_task(self._dispatch())
+        print(f"✅ Document job dispatcher started ({self.workers} worker processes)")
+    
+    def _new_executor(self) -> ProcessPoolExecutor:
+        # spawn: forking a process that runs an event loop and threads is unsafe
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=get_context("spawn"))
+    
+    # Every job on a broken pool fails with BrokenProcessPool; only the first replaces it
+    def _replace_executor(self, broken: ProcessPoolExecutor):
+        if self._executor is broken:
+            self._executor = self._new_executor()
+            broken.shutdown(wait=False, cancel_futures=True)
+    
+    # Wake the dispatcher right away (new jobs were committed)
+    def notify(self):
+        self._wake.set()
+    
+    async def _dispatch(self):
+        while not self._stopping:
+            free = self.workers - len(self._running)
+            if free > 0:
+                try:
+                    for job in await claim_jobs(self.worker_id, free):
+                        self._running[job.id] = asyncio.create_task(self._execute(job))
+                except Exception as e:
+                    print(f"⚠️  Could not claim document jobs: {e}")
+            try:
+                await asyncio.wait_for(self._wake.wait(), JOB_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+    
+    async def _execute(self, job):
+        loop = asyncio.get_running_loop()
+        executor = self._executor
+        try:
+            result = await loop.run_in_executor(executor, run_processor, job.kind, job.path, job.doc_type)
+        except asyncio.CancelledError:
+            await release_job(job.id, self.worker_id)
+            raise
+        except BrokenProcessPool as e:
+            # A worker process died (e.g. killed for memory); later jobs get a fresh pool
+            if not self._stopping:
+                self._replace_executor(executor)
+            await fail_job(job.id, self.worker_id, job.attempts, f"{type(e).__name__}: {e}")
+        except Exception as e:
+            await fail_job(job.id, self.worker_id, job.attempts, f"{type(e).__name__}: {e}")
+        else:
+            await complete_job(job.id, self.worker_id, result)
+        finally:
+            self._running.pop(job.id, None)
+            self._wake.set()  # A worker slot is free
+    
+    # Stop claiming, let running jobs finish for up to `timeout` seconds, requeue the rest
+    async def stop(self, timeout: float = JOB_SHUTDOWN_TIMEOUT):
+        if not self._loop_task:
+            return
+        self._stopping = True
+        self._wake.set()
+        await self._loop_task
+        self._loop_task = None
+    
+        if self._running:
+            _, pending = await asyncio.wait(list(self._running.values()), timeout=timeout)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+
+job_dispatcher = JobDispatcher()
+
+async def _run_worker():
+    dispatcher = JobDispatcher(max(JOB_WORKERS, 1))
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+    dispatcher.start()
+    await stop.wait()
+    print("Stopping: waiting for running jobs...")
+    await dispatcher.stop()
+    await async_engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(_run_worker())
\ No newline at end of file
@@ -1,14 +1,21 @@
+import asyncio
+import os
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from database import engine, Base, get_db, SessionLocal
+from database import get_db, SessionLocal
 from models import Admin
-from auth import get_password_hash
+from auth import get_password_hash_async, shutdown_password_executor
+from migrations import MigrationLockTimeout, prepare_database
+from jobs import job_dispatcher
+from audit import audit_log
+from events import event_hub
 import vednor_routes
 import admin_routes
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# Create tables, apply pending migrations and seed counters at startup
+# (set to 0 when `python migrations.py` runs as a deploy step instead)
+MIGRATE_ON_STARTUP = os.getenv("MIGRATE_ON_STARTUP", "1") != "0"
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -27,7 +34,6 @@ app.add_middleware(
 )
 
 # Mount uploads directory for serving files
-import os
 UPLOAD_DIR = os.path.join(os.path.dirname(__file__), "..", "uploads")
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 app.mount("/uploads", StaticFiles(directory=UPLOAD_DIR), name="uploads")
@@ -57,7 +63,15 @@ async def health_check():
 # Startup event - Create default admin if not exists
 @app.on_event("startup")
 async def startup_event():
-    """Create default admin user on startup if not exists"""
+    """Prepare the database and create the default admin user if it does not exist"""
+    if MIGRATE_ON_STARTUP:
+        try:
+            # Off the event loop: this may wait for another worker's migrations
+            await asyncio.to_thread(prepare_database)
+        except MigrationLockTimeout as e:
+            print(f"❌ {e} - not starting; run `python migrations.py` and restart")
+            raise
+    
     db = SessionLocal()
     try:
         # Check if admin exists
@@ -67,7 +81,7 @@ async def startup_event():
             # Create default admin
             default_admin = Admin(
                 username="admin",
-                hashed_password=get_password_hash("admin123")  # Change this password!
+                hashed_password=await get_password_hash_async("admin123")  # Change this password!
             )
             db.add(default_admin)
             db.commit()
@@ -78,6 +92,19 @@ async def startup_event():
         print(f"❌ Error creating default admin: {e}")
     finally:
         db.close()
+    
+    # Background document checks (disabled with JOB_WORKERS=0 when a separate worker runs them)
+    job_dispatcher.start()
+    audit_log.start()
+
+# Shutdown event - end event streams, let document jobs finish, write buffered audit events,
+# then stop the password hashing pool
+@app.on_event("shutdown")
+async def shutdown_event():
+    event_hub.close()
+    await job_dispatcher.stop()
+    await audit_log.stop()
+    await shutdown_password_executor()
 
 # Run with: uvicorn main:app --reload
 if __name__ == "__main__":
@@ -0,0 +1,168 @@
+"""
+Versioned schema migrations for the backend database.
+
+Each migration runs once, in order, in its own transaction and is recorded in
+the schema_migrations table. New databases get the current schema from
+Base.metadata.create_all first, so migrations must be safe to run against
+tables that already have the change (use checkfirst / IF NOT EXISTS).
+
+Run at deploy time (from backend/app):
+    python migrations.py            # apply pending migrations
+    python migrations.py --status   # list applied / pending migrations
+and start the API with MIGRATE_ON_STARTUP=0. Otherwise every API worker runs
+prepare_database at startup; a lock lets one of them migrate while the
+others wait for it instead of failing on "database is locked".
+"""
+import argparse
+import os
+import time
+from contextlib import contextmanager
+from sqlalchemy import Column, DateTime, String, Table, insert, inspect, select, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.sql import func
+from database import Base, engine
+from models import DocumentBlob, Vendor
+from documents import migrate_legacy_document_columns
+from search import create_search_index
+from identity import backfill_identity_keys
+from utils import ensure_vendor_id_counter
+from stats import ensure_status_counts
+
+MIGRATION_LOCK_KEY = 0x6B7963  # PostgreSQL advisory lock key, shared by every migrating process
+MIGRATION_LOCK_TIMEOUT = float(os.getenv("MIGRATION_LOCK_TIMEOUT", "600"))  # Seconds to wait for another migrator
+MIGRATION_LOCK_POLL_SECONDS = 0.5
+
+class MigrationLockTimeout(RuntimeError):
+    pass
+
+schema_migrations = Table(
+    "schema_migrations",
+    Base.metadata,
+    Column("version", String, primary_key=True),
+    Column("description", String, nullable=True),
+    Column("applied_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+# Create the model's indexes that an older database is missing
+def _create_indexes(conn, table, names):
+    for index in table.indexes:
+        if index.name in names:
+            index.create(conn, checkfirst=True)
+
+# Add a model column that an older table is missing
+def _add_column(conn, table, name):
+    if name in {column["name"] for column in inspect(conn).get_columns(table.name)}:
+        return
+    column = table.c[name]
+    column_type = column.type.compile(dialect=conn.dialect)
+    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {name} {column_type}"))
+
+def _0001_vendor_documents(conn):
+    migrate_legacy_document_columns(conn)
+
+def _0002_vendor_indexes(conn):
+    _create_indexes(conn, Vendor.__table__, {
+        "ix_vendors_status_created_at", "ix_vendors_created_at",
+        "ix_vendors_pan_number", "ix_vendors_gst_number",
+    })
+
+def _0003_vendor_search(conn):
+    create_search_index(conn)
+
+def _0004_vendor_identity_keys(conn):
+    backfill_identity_keys(conn, rebuild=True)
+
+def _0005_blob_stored_size(conn):
+    _add_column(conn, DocumentBlob.__table__, "stored_size")
+
+# (version, description, function) in the order they must run
+MIGRATIONS = [
+    ("0001", "Move document paths into vendor_documents", _0001_vendor_documents),
+    ("0002", "Indexes for status/created_at listing and PAN/GST lookups", _0002_vendor_indexes),
+    ("0003", "Full-text search index over vendors (FTS5 / tsvector)", _0003_vendor_search),
+    ("0004", "Hashed PAN/Aadhaar/GST/phone lookup keys for duplicate detection", _0004_vendor_identity_keys),
+    ("0005", "Compressed size of stored document blobs", _0005_blob_stored_size),
+]
+
+def applied_versions(bind) -> set:
+    schema_migrations.create(bind, checkfirst=True)
+    with bind.connect() as conn:
+        return {version for (version,) in conn.execute(select(schema_migrations.c.version))}
+
+# Apply every pending migration
+def run_migrations(bind=engine):
+    """Apply pending migrations in order. Safe to run from several workers."""
+    done = applied_versions(bind)
+    for version, description, migrate in MIGRATIONS:
+        if version in done:
+            continue
+        try:
+            with bind.begin() as conn:
+                migrate(conn)
+                conn.execute(insert(schema_migrations).values(version=version, description=description))
+            print(f"✅ Applied migration {version}: {description}")
+        except IntegrityError:
+            # Another worker applied it concurrently
+            pass
+
+def _acquire(try_lock, timeout: float):
+    deadline = time.monotonic() + timeout
+    if try_lock():
+        return
+    print("Waiting for another process to finish migrating the database...")
+    while not try_lock():
+        if time.monotonic() >= deadline:
+            raise MigrationLockTimeout(f"Another process has been migrating the database for over {timeout:.0f}s")
+        time.sleep(MIGRATION_LOCK_POLL_SECONDS)
+
+# Hold the migration lock: one process migrates, the others wait and then find nothing pending
+@contextmanager
+def migration_lock(bind=engine, timeout: float = MIGRATION_LOCK_TIMEOUT):
+    if bind.dialect.name == "postgresql":
+        with bind.connect() as conn:
+            key = {"key": MIGRATION_LOCK_KEY}
+            _acquire(lambda: conn.execute(text("SELECT pg_try_advisory_lock(:key)"), key).scalar(), timeout)
+            try:
+                yield
+            finally:
+                conn.execute(text("SELECT pg_advisory_unlock(:key)"), key)
+    elif bind.dialect.name == "sqlite" and bind.url.database not in (None, "", ":memory:"):
+        # File lock next to the database (SQLite is only shared by processes on one host)
+        import fcntl
+        
+        def try_lock():
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return True
+            except BlockingIOError:
+                return False
+        
+        with open(f"{bind.url.database}.migrate.lock", "a") as lock_file:
+            _acquire(try_lock, timeout)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+    else:
+        yield
+
+# Tables, pending migrations and seed rows (API startup or deploy step)
+def prepare_database(bind=engine):
+    with migration_lock(bind):
+        Base.metadata.create_all(bind=bind)
+        run_migrations(bind)
+        # One-time scans of existing vendors: the vendor ID counter and the dashboard status counters
+        ensure_vendor_id_counter(bind)
+        ensure_status_counts(bind)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply database schema migrations")
+    parser.add_argument("--status", action="store_true", help="Show applied and pending migrations")
+    args = parser.parse_args()
+    
+    if args.status:
+        done = applied_versions(engine)
+        for version, description, _ in MIGRATIONS:
+            print(f"{'applied' if version in done else 'pending'}  {version}  {description}")
+    else:
+        prepare_database(engine)
@@ -1,8 +1,17 @@
-from sqlalchemy import Column, Integer, String, DateTime, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index, Enum as SQLEnum
+from sqlalchemy.dialects.sqlite import DATETIME as SQLiteDateTime
 from sqlalchemy.sql import func
 from database import Base
 import enum
 
+# Timestamp type for keyset-paginated columns. SQLite stores datetimes as text,
+# so values bound from Python must use the same format as CURRENT_TIMESTAMP
+# (no microseconds) for cursor comparisons to line up.
+Timestamp = DateTime(timezone=True).with_variant(
+    SQLiteDateTime(storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"),
+    "sqlite",
+)
+
 # Enum for vendor status
 class VendorStatus(str, enum.Enum):
     PENDING = "pending"
@@ -12,6 +21,14 @@ class VendorStatus(str, enum.Enum):
 # Vendor Model
 class Vendor(Base):
     __tablename__ = "vendors"
+    __table_args__ = (
+        # Admin list: status filter + newest first, and the unfiltered list
+        Index("ix_vendors_status_created_at", "status", "created_at", "id"),
+        Index("ix_vendors_created_at", "created_at", "id"),
+        # Identity lookups
+        Index("ix_vendors_pan_number", "pan_number"),
+        Index("ix_vendors_gst_number", "gst_number"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     vendor_id = Column(String, unique=True, index=True, nullable=False)
@@ -86,43 +103,6 @@ class Vendor(Base):
     account_number = Column(String, nullable=True)
     ifsc_code = Column(String, nullable=True)
     
-    # KYC Documents - Identity Proof (Any 1 required)
-    aadhaar_document = Column(String, nullable=True)  # File path
-    pan_document = Column(String, nullable=True)  # File path
-    passport_document = Column(String, nullable=True)  # File path
-    voter_id_document = Column(String, nullable=True)  # File path
-    driving_license_document = Column(String, nullable=True)  # File path
-    
-    # KYC Documents - Address Proof (Any 1 required)
-    address_proof_aadhaar = Column(String, nullable=True)
-    address_proof_passport = Column(String, nullable=True)
-    address_proof_voter_id = Column(String, nullable=True)
-    address_proof_driving_license = Column(String, nullable=True)
-    address_proof_electricity_bill = Column(String, nullable=True)
-    address_proof_water_gas_bill = Column(String, nullable=True)
-    address_proof_bank_statement = Column(String, nullable=True)
-    
-    # KYC Documents - Photograph
-    passport_photo = Column(String, nullable=True)  # Passport-size photo
-    live_selfie = Column(String, nullable=True)  # Live selfie for online KYC
-    
-    # KYC Documents - Business (if applicable)
-    gst_certificate = Column(String, nullable=True)
-    partnership_deed = Column(String, nullable=True)
-    certificate_of_incorporation = Column(String, nullable=True)
-    memorandum_articles = Column(String, nullable=True)
-    shop_establishment_certificate = Column(String, nullable=True)
-    
-    # KYC Documents - Additional
-    college_id_document = Column(String, nullable=True)  # For students
-    local_address_proof = Column(String, nullable=True)  # For students (hostel/rent)
-    guardians_kyc_documents = Column(String, nullable=True)  # For minors
-    birth_certificate_document = Column(String, nullable=True)  # For minors
-    visa_document = Column(String, nullable=True)  # For NRI/OCI
-    oci_card_document = Column(String, nullable=True)  # For NRI/OCI
-    overseas_address_proof = Column(String, nullable=True)  # For NRI/OCI
-    fatca_declaration_document = Column(String, nullable=True)  # For NRI/OCI
-    
     # Status
     status = Column(SQLEnum(VendorStatus), default=VendorStatus.PENDING)
     rejection_reason = Column(String, nullable=True)
@@ -131,8 +111,136 @@ class Vendor(Base):
     notes = Column(String, nullable=True)
     
     # Timestamps
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    created_at = Column(Timestamp, server_default=func.now())
+    updated_at = Column(Timestamp, onupdate=func.now())
+
+# KYC document types (download/file name) mapped to their VendorResponse field
+DOCUMENT_TYPES = {
+    # Identity Proof Documents (Only ONE kept at a time)
+    "aadhaar": "aadhaar_document",
+    "pan": "pan_document",
+    "passport": "passport_document",
+    "voter_id": "voter_id_document",
+    "driving_license": "driving_license_document",
+    # Address Proof Documents (Only ONE kept at a time)
+    "address_proof_aadhaar": "address_proof_aadhaar",
+    "address_proof_passport": "address_proof_passport",
+    "address_proof_voter_id": "address_proof_voter_id",
+    "address_proof_driving_license": "address_proof_driving_license",
+    "address_proof_electricity_bill": "address_proof_electricity_bill",
+    "address_proof_water_gas_bill": "address_proof_water_gas_bill",
+    "address_proof_bank_statement": "address_proof_bank_statement",
+    # Photograph
+    "passport_photo": "passport_photo",
+    "live_selfie": "live_selfie",
+    # Business Documents
+    "gst_certificate": "gst_certificate",
+    "partnership_deed": "partnership_deed",
+    "certificate_of_incorporation": "certificate_of_incorporation",
+    "memorandum_articles": "memorandum_articles",
+    "shop_establishment_certificate": "shop_establishment_certificate",
+    # Additional Documents
+    "college_id_document": "college_id_document",
+    "local_address_proof": "local_address_proof",
+    "guardians_kyc_documents": "guardians_kyc_documents",
+    "birth_certificate_document": "birth_certificate_document",
+    "visa_document": "visa_document",
+    "oci_card_document": "oci_card_document",
+    "overseas_address_proof": "overseas_address_proof",
+    "fatca_declaration_document": "fatca_declaration_document",
+}
+
+# Mutually exclusive document groups, in upload priority order
+IDENTITY_PROOF_TYPES = ["aadhaar", "pan", "passport", "voter_id", "driving_license"]
+ADDRESS_PROOF_TYPES = [
+    "address_proof_aadhaar", "address_proof_passport", "address_proof_voter_id", "address_proof_driving_license",
+    "address_proof_electricity_bill", "address_proof_water_gas_bill", "address_proof_bank_statement",
+]
+
+# Vendor KYC Document Model (one row per vendor and document type)
+class VendorDocument(Base):
+    __tablename__ = "vendor_documents"
+    __table_args__ = (
+        Index("ix_vendor_documents_vendor_doc_type", "vendor_id", "doc_type", unique=True),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    vendor_id = Column(String, ForeignKey("vendors.vendor_id"), nullable=False)
+    doc_type = Column(String, nullable=False)  # Key of DOCUMENT_TYPES, e.g. "pan"
+    path = Column(String, nullable=False)  # File path
+    size = Column(Integer, nullable=True)  # Bytes
+    checksum = Column(String, nullable=True)  # SHA-256 hex digest (document_blobs key)
+    uploaded_at = Column(DateTime(timezone=True), server_default=func.now())
+
+# Normalized, keyed-hash lookup key of a vendor identity field (PAN, Aadhaar, GST, phone)
+class VendorIdentityKey(Base):
+    __tablename__ = "vendor_identity_keys"
+    __table_args__ = (
+        # Covers both the registration lookup and the duplicate GROUP BY
+        Index("ix_vendor_identity_keys_key_hash", "key_hash", "kind", "vendor_id"),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    vendor_id = Column(String, ForeignKey("vendors.vendor_id"), nullable=False, index=True)
+    kind = Column(String, nullable=False)  # Key of identity.IDENTITY_FIELDS, e.g. "pan"
+    key_hash = Column(String, nullable=False)  # HMAC-SHA256 of "<kind>:<normalized value>"
+
+# Content-addressed document file (shared by every document with the same content)
+class DocumentBlob(Base):
+    __tablename__ = "document_blobs"
+    
+    checksum = Column(String, primary_key=True)  # SHA-256 hex digest of the content
+    path = Column(String, nullable=False)  # UPLOAD_DIR/blobs/<xx>/<checksum><ext>[.gz|.zst]
+    size = Column(Integer, nullable=False)  # Bytes
+    stored_size = Column(Integer, nullable=True)  # Bytes on disk if compressed (storage_compression.py)
+    ref_count = Column(Integer, nullable=False, default=0)  # vendor_documents rows pointing here
+    created_at = Column(Timestamp, server_default=func.now())
+    updated_at = Column(Timestamp, server_default=func.now(), onupdate=func.now())
+
+# Background processing job for an uploaded document (see jobs.py)
+class JobStatus(str, enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+class DocumentJob(Base):
+    __tablename__ = "document_jobs"
+    __table_args__ = (
+        Index("ix_document_jobs_status_run_after", "status", "run_after", "id"),  # Claiming
+        Index("ix_document_jobs_vendor_doc_type", "vendor_id", "doc_type", "id"),  # Status per document
+    )
+    
+    id = Column(Integer, primary_key=True)
+    vendor_id = Column(String, ForeignKey("vendors.vendor_id"), nullable=False)
+    doc_type = Column(String, nullable=False)
+    checksum = Column(String, nullable=True)  # Document version the job was queued for
+    path = Column(String, nullable=False)
+    kind = Column(String, nullable=False)  # Key of document_checks.PROCESSORS
+    status = Column(SQLEnum(JobStatus), nullable=False, default=JobStatus.QUEUED)
+    attempts = Column(Integer, nullable=False, default=0)
+    run_after = Column(Timestamp, server_default=func.now())  # Retry backoff
+    locked_by = Column(String, nullable=True)  # Worker running the job
+    locked_at = Column(Timestamp, nullable=True)  # Lease start; stale leases are reclaimed
+    result = Column(Text, nullable=True)  # JSON from the processor
+    last_error = Column(Text, nullable=True)
+    created_at = Column(Timestamp, server_default=func.now())
+    updated_at = Column(Timestamp, server_default=func.now(), onupdate=func.now())
+
+# Append-only audit trail of vendor changes (written in batches by audit.py)
+class AuditEvent(Base):
+    __tablename__ = "vendor_audit_log"
+    __table_args__ = (
+        Index("ix_vendor_audit_log_vendor_timestamp", "vendor_id", "timestamp", "id"),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    vendor_id = Column(String, nullable=False)  # No foreign key: the trail outlives the vendor row
+    action = Column(String, nullable=False)  # e.g. "approved", "rejected", "documents_uploaded"
+    action_by = Column(String, nullable=True)  # Admin username, or "vendor"
+    comment = Column(Text, nullable=True)
+    details = Column(Text, nullable=True)  # JSON
+    timestamp = Column(Timestamp, nullable=False)  # When it happened, not when it was flushed
 
 # Admin Model (simple username/password for admin login)
 class Admin(Base):
@@ -141,4 +249,18 @@ class Admin(Base):
     id = Column(Integer, primary_key=True, index=True)
     username = Column(String, unique=True, index=True, nullable=False)
     hashed_password = Column(String, nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+# Counter table backing vendor ID allocation (one row per sequence)
+class IdCounter(Base):
+    __tablename__ = "id_counters"
+    
+    name = Column(String, primary_key=True)  # e.g. "vendor"
+    last_value = Column(Integer, nullable=False, default=0)  # Last number handed out
+
+# Vendor count per status, maintained alongside vendor writes for the dashboard
+class VendorStatusCount(Base):
+    __tablename__ = "vendor_status_counts"
+    
+    status = Column(String, primary_key=True)  # VendorStatus value
+    count = Column(Integer, nullable=False, default=0)
\ No newline at end of file
@@ -0,0 +1,50 @@
+import base64
+import json
+from datetime import datetime, timezone
+from typing import Optional, Tuple
+from fastapi import HTTPException, status
+from sqlalchemy import and_, tuple_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# A created_at filter value in UTC. SQLite stores Timestamp columns as UTC text
+# without an offset, so an aware value must be converted, not just formatted.
+def as_utc(value: datetime) -> datetime:
+    """Naive values are taken to be UTC already"""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+# Encode the (created_at, id) of the last row on a page as an opaque cursor
+def encode_cursor(created_at: Optional[datetime], row_id: int) -> str:
+    payload = [created_at.isoformat() if created_at else None, row_id]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+# Decode a cursor produced by encode_cursor
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return (datetime.fromisoformat(created_at) if created_at else None), int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+
+# Filter for rows after the cursor in (created_at DESC, id DESC) order
+def keyset_after(created_at_column, id_column, cursor: str):
+    """
+    Build the WHERE clause for the next page of a newest-first listing.
+    Written as a row-value comparison so the (created_at, id) index can seek
+    straight to the cursor. created_at is always set by the server default;
+    rows without it would only be listed if they sort before the cursor.
+    """
+    created_at, row_id = decode_cursor(cursor)
+    if created_at is None:
+        return and_(created_at_column.is_(None), id_column < row_id)
+    return tuple_(created_at_column, id_column) < tuple_(
+        created_at, row_id, types=[created_at_column.type, id_column.type]
+    )
\ No newline at end of file
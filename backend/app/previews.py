@@ -0,0 +1,163 @@
+"""
+Downscaled preview images of uploaded documents.
+
+The "preview" job (jobs.py) renders each image document - and the first page
+of each PDF - once into JPEG variants stored next to the original:
+    blobs/ab/<checksum>.pdf  ->  blobs/ab/<checksum>.thumb.jpg, <checksum>.preview.jpg
+Blob names are content hashes, so documents sharing a blob share its
+variants, and replacing a document's content gives it new variant names.
+The admin download endpoint serves them with ?variant=thumb|preview.
+
+Needs Pillow; PDF pages additionally need pypdfium2. Without them the job
+records that no variants were made and downloads fall back to the original.
+
+Variants for documents uploaded before this existed (from backend/app):
+    python previews.py backfill
+"""
+import argparse
+import io
+import os
+from importlib.util import find_spec
+from typing import Dict, List
+from storage_compression import codec_of, open_stored, original_path, read_stored
+
+# Variant name -> longest side in pixels
+PREVIEW_VARIANTS = {
+    "thumb": int(os.getenv("PREVIEW_THUMB_SIZE", "256")),
+    "preview": int(os.getenv("PREVIEW_SIZE", "1280")),
+}
+PREVIEW_QUALITY = 80
+PREVIEW_CONTENT_TYPE = "image/jpeg"
+PREVIEWS_AVAILABLE = find_spec("PIL") is not None
+PDF_PREVIEWS_AVAILABLE = PREVIEWS_AVAILABLE and find_spec("pypdfium2") is not None
+
+def variant_path(path: str, variant: str) -> str:
+    # Same name whether or not the original is compressed at rest
+    return f"{os.path.splitext(original_path(path))[0]}.{variant}.jpg"
+
+def variant_paths(path: str) -> List[str]:
+    return [variant_path(path, variant) for variant in PREVIEW_VARIANTS]
+
+def _open_image(path: str, mime_type: str):
+    from PIL import Image, ImageOps
+    
+    # Documents compressed at rest are decompressed into memory (uploads are size-capped)
+    source = read_stored(path) if codec_of(path) else path
+    if mime_type == "application/pdf":
+        import pypdfium2
+        
+        pdf = pypdfium2.PdfDocument(source)
+        try:
+            page = pdf[0]
+            # Render at the scale the largest variant needs, not at full print size
+            width, height = page.get_size()
+            scale = min(max(PREVIEW_VARIANTS.values()) / max(width, height, 1), 4.0)
+            return page.render(scale=scale).to_pil()
+        finally:
+            pdf.close()
+    image = Image.open(io.BytesIO(source) if isinstance(source, bytes) else source)
+    largest = max(PREVIEW_VARIANTS.values())
+    image.draft("RGB", (largest, largest))  # JPEG: decode at reduced size
+    return ImageOps.exif_transpose(image)
+
+def _to_rgb(image):
+    from PIL import Image
+    
+    if image.mode in ("RGBA", "LA", "P"):
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, "white")
+        background.paste(image, mask=image.getchannel("A"))
+        return background
+    return image.convert("RGB")
+
+# Write all variants of one decoded document; returns variant -> size in bytes
+def render_variants(path: str, image) -> Dict[str, int]:
+    written = {}
+    # Largest first, each variant scaled down from the previous one
+    for variant, size in sorted(PREVIEW_VARIANTS.items(), key=lambda item: -item[1]):
+        if max(image.size) > size:
+            image = image.resize(_fit(image.size, size), reducing_gap=3.0)
+        target = variant_path(path, variant)
+        temp = f"{target}.{os.getpid()}.tmp"
+        image.save(temp, "JPEG", quality=PREVIEW_QUALITY, optimize=True, progressive=True)
+        os.replace(temp, target)  # Readers never see a half-written variant
+        written[variant] = os.path.getsize(target)
+    return written
+
+# Errors meaning the content cannot be decoded (retrying will not help).
+# Any other error, including a plain OSError, fails the job so it is retried.
+def _decode_errors() -> tuple:
+    from PIL import Image, UnidentifiedImageError
+    
+    errors = (UnidentifiedImageError, Image.DecompressionBombError)
+    if PDF_PREVIEWS_AVAILABLE:
+        from pypdfium2 import PdfiumError
+        
+        errors += (PdfiumError,)
+    return errors
+
+def _fit(dimensions, size: int):
+    width, height = dimensions
+    ratio = size / max(width, height)
+    return max(round(width * ratio), 1), max(round(height * ratio), 1)
+
+# Processor for jobs.py: render variants unless they already exist
+def render_previews(path: str, doc_type: str) -> dict:
+    from document_checks import detect_mime_type
+    
+    if not PREVIEWS_AVAILABLE:
+        return {"variants": {}, "skipped": "Previews need Pillow"}
+    with open_stored(path) as f:
+        mime_type = detect_mime_type(f.read(16))
+    if mime_type is None:
+        return {"variants": {}, "skipped": "Not an image or PDF"}
+    if mime_type == "application/pdf" and not PDF_PREVIEWS_AVAILABLE:
+        return {"variants": {}, "skipped": "PDF previews need pypdfium2"}
+    
+    existing = {variant: variant_path(path, variant) for variant in PREVIEW_VARIANTS}
+    if all(os.path.exists(target) for target in existing.values()):
+        # Same content already rendered for another document
+        return {"variants": {variant: os.path.getsize(target) for variant, target in existing.items()}}
+    try:
+        # Decoded completely before any variant is written
+        image = _to_rgb(_open_image(path, mime_type))
+    except _decode_errors() as e:
+        # Malformed document: record it instead of failing the job (and backfill re-queueing it)
+        return {"variants": {}, "skipped": f"Could not decode document: {e}"}
+    return {"variants": render_variants(path, image)}
+
+# Queue preview jobs for documents that have no variants and no pending or finished preview job
+def backfill_previews(bind) -> int:
+    from sqlalchemy import select
+    from sqlalchemy.orm import Session
+    from models import DocumentJob, JobStatus, VendorDocument
+    
+    queued = 0
+    with Session(bind) as db:
+        handled = set(db.execute(
+            select(DocumentJob.vendor_id, DocumentJob.doc_type, DocumentJob.checksum)
+            .where(DocumentJob.kind == "preview", DocumentJob.status != JobStatus.FAILED)
+        ).all())
+        documents = db.execute(
+            select(VendorDocument.vendor_id, VendorDocument.doc_type, VendorDocument.path, VendorDocument.checksum)
+        ).all()
+        for vendor_id, doc_type, path, checksum in documents:
+            if (vendor_id, doc_type, checksum) in handled or not os.path.exists(path):
+                continue
+            if all(os.path.exists(target) for target in variant_paths(path)):
+                continue
+            db.add(DocumentJob(vendor_id=vendor_id, doc_type=doc_type, path=path, checksum=checksum, kind="preview"))
+            queued += 1
+        db.commit()
+    return queued
+
+if __name__ == "__main__":
+    from database import engine
+    
+    parser = argparse.ArgumentParser(description="Document preview variants")
+    parser.add_argument("command", choices=["backfill"], help="backfill: queue preview jobs for documents without variants")
+    parser.parse_args()
+    
+    if not PREVIEWS_AVAILABLE:
+        print("⚠️  Pillow is not installed - preview jobs would render nothing")
+    print(f"✅ Queued {backfill_previews(engine)} preview jobs")
\ No newline at end of file
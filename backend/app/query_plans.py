@@ -0,0 +1,75 @@
+"""
+Check that the hot admin queries are served from indexes.
+
+Runs EXPLAIN QUERY PLAN (SQLite) for each query and fails if any of them
+scans the vendors or vendor_documents table without an index, or sorts in
+a temp B-tree instead of reading an index in order.
+
+Usage (from backend/app, after migrations):
+    python query_plans.py
+"""
+import sys
+from datetime import datetime
+from sqlalchemy import select
+from database import engine
+from models import Vendor, VendorDocument, VendorStatus
+from pagination import encode_cursor
+from admin_routes import DEFAULT_LIST_FIELDS, vendor_list_query
+
+CHECKED_TABLES = ("vendors", "vendor_documents")
+
+def admin_queries():
+    cursor = encode_cursor(datetime(2024, 1, 1), 100)
+    return [
+        ("vendor list", vendor_list_query(DEFAULT_LIST_FIELDS, None, None, 51)),
+        ("vendor list, next page", vendor_list_query(DEFAULT_LIST_FIELDS, None, cursor, 51)),
+        ("vendor list by status", vendor_list_query(DEFAULT_LIST_FIELDS, VendorStatus.PENDING, None, 51)),
+        ("vendor list by status, next page", vendor_list_query(DEFAULT_LIST_FIELDS, VendorStatus.PENDING, cursor, 51)),
+        ("vendor by vendor_id", select(Vendor).where(Vendor.vendor_id == "VEN000001")),
+        ("vendor by PAN", select(Vendor.vendor_id).where(Vendor.pan_number == "ABCDE1234F")),
+        ("vendor by GST", select(Vendor.vendor_id).where(Vendor.gst_number == "22ABCDE1234F1Z5")),
+        ("document lookup", select(VendorDocument.path).where(
+            VendorDocument.vendor_id == "VEN000001", VendorDocument.doc_type == "pan")),
+    ]
+
+def _driver_value(value):
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    if isinstance(value, VendorStatus):
+        return value.name
+    return value
+
+# EXPLAIN QUERY PLAN detail lines for a statement
+def query_plan(conn, statement):
+    compiled = statement.compile(dialect=conn.dialect)
+    params = tuple(_driver_value(compiled.params[name]) for name in compiled.positiontup)
+    rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params).all()
+    return [row[-1] for row in rows]
+
+# Plan lines that mean a full table scan or an extra sort
+def plan_problems(plan):
+    problems = []
+    for detail in plan:
+        scanned = detail.startswith("SCAN ") and detail.split()[1] in CHECKED_TABLES
+        if scanned and "USING" not in detail:
+            problems.append(detail)
+        if "USE TEMP B-TREE" in detail:
+            problems.append(detail)
+    return problems
+
+def check_query_plans(bind=engine) -> bool:
+    if bind.dialect.name != "sqlite":
+        print(f"Query plan check is only implemented for SQLite (got {bind.dialect.name})")
+        return True
+    
+    ok = True
+    with bind.connect() as conn:
+        for name, statement in admin_queries():
+            plan = query_plan(conn, statement)
+            problems = plan_problems(plan)
+            ok = ok and not problems
+            print(f"{'FAIL' if problems else 'ok  '}  {name}: {' | '.join(plan)}")
+    return ok
+
+if __name__ == "__main__":
+    sys.exit(0 if check_query_plans() else 1)
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional
+from pydantic import BaseModel, EmailStr, Field
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 from models import VendorStatus
 
@@ -202,6 +202,92 @@ class VendorResponse(BaseModel):
     class Config:
         from_attributes = True
 
+# Compact Vendor Schema (admin list view)
+class VendorSummary(BaseModel):
+    id: int
+    vendor_id: str
+    name: str
+    business_name: Optional[str] = None
+    email: str
+    phone: str
+    current_city: Optional[str] = None
+    status: VendorStatus
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+# Paginated Vendor List Schema
+class VendorPage(BaseModel):
+    items: List[Dict[str, Any]]  # Requested vendor columns (VendorSummary fields by default)
+    next_cursor: Optional[str] = None  # Pass back as ?cursor= to fetch the next page
+
+# Vendor Search Result Schema
+class VendorSearchPage(BaseModel):
+    items: List[Dict[str, Any]]  # Best matches first
+    next_offset: Optional[int] = None  # Pass back as ?offset= to fetch the next page
+
+# Duplicate Identity Cluster Schemas
+class DuplicateVendor(BaseModel):
+    vendor_id: str
+    name: str
+    business_name: Optional[str] = None
+    status: VendorStatus
+    created_at: Optional[datetime] = None
+
+class DuplicateCluster(BaseModel):
+    kind: str  # pan | aadhaar | gst | phone
+    label: str
+    vendors: List[DuplicateVendor]  # Oldest registration first
+
+class DuplicateClusterPage(BaseModel):
+    clusters: List[DuplicateCluster]
+    next_cursor: Optional[str] = None  # Pass back as ?cursor= to fetch the next page
+
+# Document Processing Job Schema
+class DocumentJobResponse(BaseModel):
+    id: int
+    doc_type: str
+    kind: str  # Processor, e.g. "inspect"
+    checksum: Optional[str] = None  # Document version the job ran on
+    status: str  # queued | running | done | failed
+    attempts: int
+    last_error: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+# Audit Trail Schemas
+class AuditEventResponse(BaseModel):
+    id: int
+    action: str  # registered | approved | rejected | pending | documents_uploaded
+    action_by: Optional[str] = None  # Admin username, or "vendor"
+    comment: Optional[str] = None
+    details: Optional[Dict[str, Any]] = None
+    timestamp: datetime
+
+class AuditEventPage(BaseModel):
+    items: List[AuditEventResponse]  # Newest first
+    next_cursor: Optional[str] = None  # Pass back as ?cursor= to fetch the next page
+
+# Bulk Import Report Schemas
+class BulkImportRowError(BaseModel):
+    row: int  # Line number in the uploaded file
+    errors: List[str]
+
+class BulkImportCreated(BaseModel):
+    row: int
+    vendor_id: str
+
+class BulkImportResult(BaseModel):
+    total_rows: int
+    valid_rows: int
+    imported: int
+    failed: int
+    dry_run: bool
+    created: List[BulkImportCreated]
+    errors: List[BulkImportRowError]
+
 # Status Check Schema
 class StatusCheckRequest(BaseModel):
     vendor_id: str
@@ -219,6 +305,30 @@ class UpdateVendorStatus(BaseModel):
     status: VendorStatus
     rejection_reason: Optional[str] = None
 
+# Admin Bulk Status Update Schemas
+MAX_BULK_STATUS_VENDORS = 1000
+
+class BulkStatusUpdate(BaseModel):
+    status: VendorStatus
+    rejection_reason: Optional[str] = None
+    # Either explicit vendor IDs...
+    vendor_ids: Optional[List[str]] = Field(None, min_length=1, max_length=MAX_BULK_STATUS_VENDORS)
+    # ...or a filter (oldest first, at most `limit` vendors)
+    current_status: Optional[VendorStatus] = None
+    created_before: Optional[datetime] = None
+    limit: int = Field(MAX_BULK_STATUS_VENDORS, ge=1, le=MAX_BULK_STATUS_VENDORS)
+
+class BulkStatusItem(BaseModel):
+    vendor_id: str
+    result: str  # updated | not_found | conflict
+    previous_status: Optional[VendorStatus] = None
+
+class BulkStatusResult(BaseModel):
+    status: VendorStatus
+    requested: int
+    updated: int
+    results: List[BulkStatusItem]
+
 # Admin Login Schema
 class AdminLogin(BaseModel):
     username: str
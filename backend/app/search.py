@@ -0,0 +1,132 @@
+import re
+from typing import List, Optional
+from sqlalchemy import Index, column, func, literal_column, or_, select, table, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import Vendor, VendorStatus
+
+# Vendor columns covered by admin search, with their bm25 weight on SQLite
+SEARCH_FIELDS = {
+    "vendor_id": 10.0,
+    "name": 5.0,
+    "business_name": 5.0,
+    "email": 3.0,
+    "phone": 3.0,
+    "pan_number": 8.0,
+    "gst_number": 8.0,
+    "current_city": 1.0,
+}
+MAX_SEARCH_TERMS = 8
+RANKED_SEARCH_LIMIT = 5000  # Matches beyond this are returned newest first instead of ranked
+
+vendors_fts = table("vendors_fts", column("rowid"))
+
+# Terms of a search string; punctuation only separates terms, so user input
+# never reaches the FTS query syntax
+def search_terms(q: str) -> List[str]:
+    return re.findall(r"\w+", q.lower())[:MAX_SEARCH_TERMS]
+
+# SQLite: external-content FTS5 table kept in sync with vendors by triggers,
+# so every writer (register, bulk import, admin updates, raw SQL) is covered
+def _sqlite_fts_ddl() -> List[str]:
+    columns = ", ".join(SEARCH_FIELDS)
+    new_values = ", ".join(f"new.{name}" for name in SEARCH_FIELDS)
+    old_values = ", ".join(f"old.{name}" for name in SEARCH_FIELDS)
+    delete_old = f"INSERT INTO vendors_fts(vendors_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values});"
+    insert_new = f"INSERT INTO vendors_fts(rowid, {columns}) VALUES (new.id, {new_values});"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS vendors_fts USING fts5("
+        f"{columns}, content='vendors', content_rowid='id', tokenize='unicode61', prefix='2 3 4')",
+        f"CREATE TRIGGER IF NOT EXISTS vendors_fts_insert AFTER INSERT ON vendors BEGIN {insert_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS vendors_fts_delete AFTER DELETE ON vendors BEGIN {delete_old} END",
+        f"CREATE TRIGGER IF NOT EXISTS vendors_fts_update AFTER UPDATE OF {columns} ON vendors "
+        f"BEGIN {delete_old} {insert_new} END",
+        "INSERT INTO vendors_fts(vendors_fts) VALUES ('rebuild')",
+    ]
+
+# Postgres: the tsvector is an expression index, so it never goes stale
+def _pg_document():
+    # || and coalesce keep the expression IMMUTABLE (concat_ws is not), as an index
+    # requires; literals rather than bound parameters so queries match the index
+    parts = [func.coalesce(getattr(Vendor, name), literal_column("''")) for name in SEARCH_FIELDS]
+    document = parts[0]
+    for part in parts[1:]:
+        document = document.op("||")(literal_column("' '")).op("||")(part)
+    return func.to_tsvector(literal_column("'simple'::regconfig"), document)
+
+# Create the search index for the current database (migration 0003)
+def create_search_index(conn):
+    dialect = conn.dialect.name
+    if dialect == "sqlite":
+        for statement in _sqlite_fts_ddl():
+            conn.execute(text(statement))
+    elif dialect == "postgresql":
+        Index("ix_vendors_search", _pg_document(), postgresql_using="gin").create(conn, checkfirst=True)
+
+def _fts_match(terms: List[str]):
+    return literal_column("vendors_fts").op("MATCH")(" ".join(f'"{term}"*' for term in terms))
+
+def _pg_tsquery(terms: List[str]):
+    return func.to_tsquery(literal_column("'simple'::regconfig"), " & ".join(f"{term}:*" for term in terms))
+
+# Prefix-matching search query, best matches first when `ranked`
+def vendor_search_query(dialect: str, terms: List[str], fields: List[str], status_filter: Optional[VendorStatus],
+                        limit: int, offset: int, ranked: bool = True):
+    """
+    Every term must match (as a prefix) one of SEARCH_FIELDS. Ranked
+    results are ordered by relevance, unranked ones newest first.
+    """
+    columns = [getattr(Vendor, name) for name in fields]
+    if dialect == "sqlite":
+        query = (
+            select(*columns)
+            .select_from(vendors_fts.join(Vendor.__table__, Vendor.id == vendors_fts.c.rowid))
+            .where(_fts_match(terms))
+        )
+        if ranked:
+            query = query.order_by(func.bm25(literal_column("vendors_fts"), *SEARCH_FIELDS.values()), Vendor.id.desc())
+        else:
+            query = query.order_by(vendors_fts.c.rowid.desc())
+    elif dialect == "postgresql":
+        tsquery = _pg_tsquery(terms)
+        document = _pg_document()
+        query = select(*columns).where(document.op("@@")(tsquery))
+        if ranked:
+            query = query.order_by(func.ts_rank(document, tsquery).desc(), Vendor.id.desc())
+        else:
+            query = query.order_by(Vendor.id.desc())
+    else:
+        # No full-text index: every term must prefix-match some search column
+        query = select(*columns).order_by(Vendor.id.desc())
+        for term in terms:
+            query = query.where(or_(*[getattr(Vendor, name).ilike(f"{term}%") for name in SEARCH_FIELDS]))
+    
+    if status_filter:
+        query = query.where(Vendor.status == status_filter)
+    return query.limit(limit).offset(offset)
+
+# Number of matches, counting no further than `cap`
+def match_count_query(dialect: str, terms: List[str], cap: int):
+    if dialect == "sqlite":
+        matches = select(vendors_fts.c.rowid).where(_fts_match(terms)).limit(cap)
+    elif dialect == "postgresql":
+        matches = select(Vendor.id).where(_pg_document().op("@@")(_pg_tsquery(terms))).limit(cap)
+    else:
+        return None
+    return select(func.count()).select_from(matches.subquery())
+
+# Run a search
+async def search_vendor_rows(db: AsyncSession, terms: List[str], fields: List[str],
+                             status_filter: Optional[VendorStatus], limit: int, offset: int):
+    """
+    Relevance ranking scores every match, so it is only used when the terms
+    match at most RANKED_SEARCH_LIMIT vendors (found with a capped count).
+    Broader searches ("ravi" in a million vendors) return newest first,
+    which the index serves straight from its rowid order.
+    """
+    dialect = db.bind.dialect.name
+    ranked = True
+    probe = match_count_query(dialect, terms, RANKED_SEARCH_LIMIT + 1)
+    if probe is not None:
+        ranked = (await db.execute(probe)).scalar_one() <= RANKED_SEARCH_LIMIT
+    query = vendor_search_query(dialect, terms, fields, status_filter, limit, offset, ranked)
+    return (await db.execute(query)).all()
\ No newline at end of file
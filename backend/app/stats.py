@@ -0,0 +1,77 @@
+from typing import Dict, Union
+from sqlalchemy import func, select, insert, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+from cache import TTLCache
+from models import Vendor, VendorStatus, VendorStatusCount
+
+# Dashboard stats are served from this cache for a few seconds; writes in this
+# worker invalidate it, other workers catch up when the entry expires
+STATS_CACHE_TTL_SECONDS = 5
+stats_cache = TTLCache(maxsize=1, ttl=STATS_CACHE_TTL_SECONDS)
+
+# Count vendors per status in a single GROUP BY pass
+def count_vendors_by_status(conn) -> Dict[VendorStatus, int]:
+    counts = {vendor_status: 0 for vendor_status in VendorStatus}
+    rows = conn.execute(select(Vendor.status, func.count()).group_by(Vendor.status))
+    for vendor_status, count in rows:
+        if vendor_status is not None:
+            counts[VendorStatus(vendor_status)] = count
+    return counts
+
+# Seed the vendor_status_counts table
+def ensure_status_counts(bind, rebuild: bool = False):
+    """
+    Fill vendor_status_counts from the vendors table if it is empty.
+    With rebuild=True the counters are recomputed even if they exist.
+    Safe to call from several workers at startup.
+    """
+    try:
+        with bind.begin() as conn:
+            existing = conn.execute(select(func.count()).select_from(VendorStatusCount)).scalar_one()
+            if existing and not rebuild:
+                return
+            
+            counts = count_vendors_by_status(conn)
+            conn.execute(VendorStatusCount.__table__.delete())
+            conn.execute(insert(VendorStatusCount), [
+                {"status": vendor_status.value, "count": count} for vendor_status, count in counts.items()
+            ])
+    except IntegrityError:
+        # Another worker seeded the counters first
+        pass
+    stats_cache.clear()
+
+# Adjust a status counter inside the caller's transaction (session or connection)
+async def adjust_status_count(db: Union[AsyncSession, AsyncConnection], vendor_status: VendorStatus, delta: int):
+    """
+    Add `delta` to the counter for `vendor_status`; committed with the
+    caller's changes. The caller clears stats_cache after its commit, so a
+    concurrent read cannot cache the counts from before it.
+    """
+    await db.execute(
+        update(VendorStatusCount)
+        .where(VendorStatusCount.status == VendorStatus(vendor_status).value)
+        .values(count=VendorStatusCount.count + delta)
+    )
+
+# Current counts for the admin dashboard
+async def get_status_counts(db: AsyncSession) -> Dict[str, int]:
+    """Read the per-status counters (a handful of rows) behind a short TTL cache"""
+    stats = stats_cache.get("dashboard")
+    if stats is not None:
+        return stats
+    
+    counts = {vendor_status.value: 0 for vendor_status in VendorStatus}
+    rows = await db.execute(select(VendorStatusCount.status, VendorStatusCount.count))
+    for vendor_status, count in rows:
+        counts[vendor_status] = count
+    
+    stats = {
+        "total_vendors": sum(counts.values()),
+        "pending": counts[VendorStatus.PENDING.value],
+        "approved": counts[VendorStatus.APPROVED.value],
+        "rejected": counts[VendorStatus.REJECTED.value],
+    }
+    stats_cache.set("dashboard", stats)
+    return stats
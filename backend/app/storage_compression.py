@@ -0,0 +1,174 @@
+"""
+Optional at-rest compression of stored documents.
+
+With STORAGE_COMPRESSION=gzip (or zstd, which needs the zstandard package)
+new blobs with a compressible extension are compressed while they are
+written and kept compressed only if that saves at least
+MIN_COMPRESSION_SAVING. A compressed blob is the original name plus ".gz" /
+".zst"; readers go through open_stored / iter_stored, which decompress on
+the fly, so the rest of the app never sees the difference.
+
+Kept free of database imports: the job worker processes read documents too.
+"""
+import gzip
+import os
+import threading
+import time
+from importlib.util import find_spec
+from typing import BinaryIO, Dict, Iterator, Optional, Tuple
+
+COMPRESSION_SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+COMPRESSION_LEVELS = {
+    "gzip": int(os.getenv("STORAGE_GZIP_LEVEL", "6")),
+    "zstd": int(os.getenv("STORAGE_ZSTD_LEVEL", "3")),
+}
+MIN_COMPRESSION_SAVING = 0.1  # Smaller savings are not worth decompressing on every read
+READ_CHUNK_SIZE = 1024 * 1024
+
+# Formats that are compressed internally; compressing them again saves nothing.
+# PDFs are tried: scanner output is often uncompressed.
+INCOMPRESSIBLE_EXTENSIONS = {
+    ".jpg", ".jpeg", ".png", ".gif", ".webp", ".heic",
+    ".zip", ".gz", ".zst", ".docx", ".xlsx", ".mp4",
+}
+
+def _configured_codec() -> Optional[str]:
+    codec = os.getenv("STORAGE_COMPRESSION", "").strip().lower()
+    if not codec or codec == "none":
+        return None
+    if codec not in COMPRESSION_SUFFIXES:
+        print(f"⚠️  Unknown STORAGE_COMPRESSION {codec!r} - documents are stored uncompressed")
+        return None
+    if codec == "zstd" and find_spec("zstandard") is None:
+        print("⚠️  STORAGE_COMPRESSION=zstd but the zstandard package is not installed - using gzip")
+        return "gzip"
+    return codec
+
+STORAGE_CODEC = _configured_codec()
+
+# Process-wide counters for the storage report
+_stats_lock = threading.Lock()
+_stats = {
+    "compressed_bytes_in": 0,
+    "compressed_bytes_out": 0,
+    "compress_cpu_seconds": 0.0,
+    "decompressed_bytes": 0,
+    "decompress_cpu_seconds": 0.0,
+}
+
+def _record(**deltas):
+    with _stats_lock:
+        for key, value in deltas.items():
+            _stats[key] += value
+
+def compression_stats() -> Dict:
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["codec"] = STORAGE_CODEC
+    stats["ratio"] = round(stats["compressed_bytes_in"] / stats["compressed_bytes_out"], 3) if stats["compressed_bytes_out"] else 1.0
+    stats["compress_cpu_seconds"] = round(stats["compress_cpu_seconds"], 3)
+    stats["decompress_cpu_seconds"] = round(stats["decompress_cpu_seconds"], 3)
+    return stats
+
+def codec_of(path: str) -> Optional[str]:
+    for codec, suffix in COMPRESSION_SUFFIXES.items():
+        if path.endswith(suffix):
+            return codec
+    return None
+
+# Name of the document as uploaded (without the compression suffix)
+def original_path(path: str) -> str:
+    codec = codec_of(path)
+    return path[:-len(COMPRESSION_SUFFIXES[codec])] if codec else path
+
+def should_compress(extension: str, codec: Optional[str] = STORAGE_CODEC) -> bool:
+    return codec is not None and extension.lower() not in INCOMPRESSIBLE_EXTENSIONS
+
+def worth_keeping(size: int, stored_size: int) -> bool:
+    return stored_size <= size * (1 - MIN_COMPRESSION_SAVING)
+
+class CompressingWriter:
+    """Compresses everything written to it into `out` (which stays open)"""
+    
+    def __init__(self, out: BinaryIO, codec: str):
+        self.codec = codec
+        if codec == "zstd":
+            import zstandard
+    
+            self._writer = zstandard.ZstdCompressor(level=COMPRESSION_LEVELS["zstd"]).stream_writer(out, closefd=False)
+        else:
+            self._writer = gzip.GzipFile(fileobj=out, mode="wb", compresslevel=COMPRESSION_LEVELS["gzip"], mtime=0)
+        self._out = out
+        self._start = out.tell()
+        self.bytes_in = 0
+    
+    def write(self, data: bytes) -> int:
+        started = time.thread_time()
+        self._writer.write(data)
+        self.bytes_in += len(data)
+        _record(compress_cpu_seconds=time.thread_time() - started)
+        return len(data)
+    
+    def close(self) -> int:
+        """Finish the stream; returns the compressed size"""
+        started = time.thread_time()
+        self._writer.close()
+        stored_size = self._out.tell() - self._start
+        _record(compress_cpu_seconds=time.thread_time() - started,
+                compressed_bytes_in=self.bytes_in, compressed_bytes_out=stored_size)
+        return stored_size
+
+class _TimedReader:
+    """Decompressing reader that counts its CPU time"""
+    
+    def __init__(self, reader):
+        self._reader = reader
+    
+    def read(self, size: int = -1) -> bytes:
+        started = time.thread_time()
+        data = self._reader.read(size)
+        _record(decompress_cpu_seconds=time.thread_time() - started, decompressed_bytes=len(data))
+        return data
+    
+    def close(self):
+        self._reader.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+
+# Open a stored document for reading its original content
+def open_stored(path: str) -> BinaryIO:
+    codec = codec_of(path)
+    if codec == "gzip":
+        return _TimedReader(gzip.open(path, "rb"))
+    if codec == "zstd":
+        import zstandard
+    
+        return _TimedReader(zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True))
+    return open(path, "rb")
+
+def read_stored(path: str) -> bytes:
+    with open_stored(path) as f:
+        return f.read()
+
+# Original content of a stored document in chunks (for streaming responses)
+def iter_stored(path: str, chunk_size: int = READ_CHUNK_SIZE) -> Iterator[bytes]:
+    with open_stored(path) as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            yield chunk
+
+# Compress an existing file (backfill); returns (stored size, CPU seconds)
+def compress_file(source: str, target: str, codec: str) -> Tuple[int, float]:
+    started = time.thread_time()
+    with open(source, "rb") as f, open(target, "wb") as out:
+        writer = CompressingWriter(out, codec)
+        for chunk in iter(lambda: f.read(READ_CHUNK_SIZE), b""):
+            writer.write(chunk)
+        stored_size = writer.close()
+        out.flush()
+        os.fsync(out.fileno())
+    os.chmod(target, 0o644)
+    return stored_size, time.thread_time() - started
\ No newline at end of file
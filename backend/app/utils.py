@@ -1,74 +1,270 @@
+import asyncio
+import hashlib
 import os
-from fastapi import UploadFile
-from typing import Optional
+import tempfile
+from fastapi import HTTPException, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select, insert, update
+from sqlalchemy.exc import IntegrityError
+from typing import Awaitable, Iterable, List, NamedTuple, Optional, Tuple
+from storage_compression import CompressingWriter
 
 # Create uploads directory if it doesn't exist
 # Use absolute path to ensure it works regardless of where the app is run from
 UPLOAD_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "uploads")
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
-# Generate unique sequential vendor ID
-def generate_vendor_id(db_session) -> str:
-    """
-    Generate sequential vendor ID (VEN000001, VEN000002, etc.)
-    Requires database session to check existing IDs
-    """
-    from models import Vendor
+# Uploads are streamed to disk in chunks and capped per file
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1 MB
+MAX_UPLOAD_SIZE = int(os.getenv("MAX_UPLOAD_SIZE_MB", "10")) * 1024 * 1024
+UPLOAD_CONCURRENCY = 8  # Files of one request written in parallel
+
+# An uploaded file written to disk
+class StoredFile(NamedTuple):
+    path: str  # Final file path
+    size: int  # Bytes written
+    checksum: str  # SHA-256 hex digest of the content
+    temp_path: Optional[str] = None  # Staged location until promoted
+    stored_size: Optional[int] = None  # Bytes on disk when stored compressed
+
+VENDOR_ID_PREFIX = "VEN"
+VENDOR_ID_COUNTER = "vendor"  # Row name in the id_counters table
+
+# Parse the numeric part of a VEN###### ID (None for other formats)
+def _vendor_id_number(vendor_id: Optional[str]) -> Optional[int]:
+    if not vendor_id or not vendor_id.startswith(VENDOR_ID_PREFIX):
+        return None
+    try:
+        # Extract number from vendor_id (e.g., "VEN000123" -> 123)
+        return int(vendor_id[len(VENDOR_ID_PREFIX):].lstrip("0") or "0")
+    except ValueError:
+        # Skip invalid IDs (old random format)
+        return None
+
+# Seed the vendor ID counter from existing vendors
+def _seed_vendor_id_counter(conn):
+    """Insert the counter row from the highest existing VEN###### ID (no-op if present)"""
+    from models import Vendor, IdCounter
     
-    # Get all existing vendor IDs
-    all_vendors = db_session.query(Vendor.vendor_id).all()
+    exists = conn.execute(
+        select(IdCounter.name).where(IdCounter.name == VENDOR_ID_COUNTER)
+    ).first()
+    if exists:
+        return
     
     max_number = 0
-    for (vendor_id,) in all_vendors:
-        if vendor_id and vendor_id.startswith("VEN"):
-            try:
-                # Extract number from vendor_id (e.g., "VEN000123" -> 123)
-                number_str = vendor_id.replace("VEN", "").lstrip("0") or "0"
-                number = int(number_str)
-                if number > max_number:
-                    max_number = number
-            except (ValueError, AttributeError):
-                # Skip invalid IDs (old random format)
-                continue
+    rows = conn.execute(
+        select(Vendor.vendor_id).where(Vendor.vendor_id.like(f"{VENDOR_ID_PREFIX}%"))
+    )
+    for (vendor_id,) in rows:
+        number = _vendor_id_number(vendor_id)
+        if number is not None and number > max_number:
+            max_number = number
     
-    # Next number is max + 1
-    next_number = max_number + 1
+    conn.execute(insert(IdCounter).values(name=VENDOR_ID_COUNTER, last_value=max_number))
+
+def ensure_vendor_id_counter(bind):
+    """
+    Create the vendor ID counter row if it does not exist yet.
+    Scans existing vendor IDs once to find the highest number; after that
+    IDs are handed out from the counter without touching the vendors table.
+    Safe to call from several workers at startup.
+    """
+    try:
+        with bind.begin() as conn:
+            _seed_vendor_id_counter(conn)
+    except IntegrityError:
+        # Another worker seeded the counter first
+        pass
+
+# Reserve a block of sequential vendor IDs
+async def reserve_vendor_ids(db_session, count: int = 1) -> List[str]:
+    """
+    Reserve `count` consecutive vendor IDs (VEN000001, VEN000002, etc.)
+    The counter row is bumped with a single UPDATE in its own short
+    transaction, so concurrent requests and workers never get the same ID.
+    IDs of failed registrations are not reused (gaps are expected).
+    """
+    from models import IdCounter
     
-    # Format as VEN000001, VEN000002, etc. (with zero padding to 6 digits)
-    vendor_id = f"VEN{next_number:06d}"
+    if count < 1:
+        raise ValueError("count must be at least 1")
     
-    # Final uniqueness check (safety)
-    existing = db_session.query(Vendor).filter(Vendor.vendor_id == vendor_id).first()
-    if existing:
-        # If collision, increment and try again
-        next_number += 1
-        vendor_id = f"VEN{next_number:06d}"
+    bind = db_session.bind
+    for _ in range(2):
+        async with bind.begin() as conn:
+            result = await conn.execute(
+                update(IdCounter)
+                .where(IdCounter.name == VENDOR_ID_COUNTER)
+                .values(last_value=IdCounter.last_value + count)
+            )
+            if result.rowcount:
+                last_value = (await conn.execute(
+                    select(IdCounter.last_value).where(IdCounter.name == VENDOR_ID_COUNTER)
+                )).scalar_one()
+                first_value = last_value - count + 1
+                return [f"{VENDOR_ID_PREFIX}{number:06d}" for number in range(first_value, last_value + 1)]
+        # Counter row missing (fresh database) - seed it and retry
+        try:
+            async with bind.begin() as conn:
+                await conn.run_sync(_seed_vendor_id_counter)
+        except IntegrityError:
+            pass
     
-    return vendor_id
+    raise RuntimeError("Vendor ID counter is not initialized")
 
-# Save uploaded file
-async def save_upload_file(file: UploadFile, vendor_id: str, doc_type: str) -> str:
+# Generate unique sequential vendor ID
+async def generate_vendor_id(db_session) -> str:
     """
-    Save uploaded file and return the file path
-    doc_type: 'pan', 'gst', or 'certificate'
+    Generate sequential vendor ID (VEN000001, VEN000002, etc.)
+    Requires database session to reach the ID counter
+    """
+    return (await reserve_vendor_ids(db_session, 1))[0]
+
+# Stage an uploaded file on disk without loading it into memory
+async def stage_upload_file(file: UploadFile, vendor_id: str, doc_type: str) -> StoredFile:
+    """
+    Stage an upload as UPLOAD_DIR/<vendor_id>/<doc_type><ext> (see stage_stream).
+    Call promote_staged_file to move it into place or discard_staged_file
+    to throw it away.
     """
     # Create vendor-specific folder
     vendor_folder = os.path.join(UPLOAD_DIR, vendor_id)
-    os.makedirs(vendor_folder, exist_ok=True)
     
     # Get file extension
-    file_extension = os.path.splitext(file.filename)[1]
+    file_extension = os.path.splitext(file.filename or "")[1]
     
-    # Create unique filename
+    # Final filename, written via a temp file in the same folder
     filename = f"{doc_type}{file_extension}"
-    file_path = os.path.join(vendor_folder, filename)
+    return await stage_stream(file, os.path.join(vendor_folder, filename), doc_type)
+
+# Stream an upload into a temp file next to `file_path`
+async def stage_stream(file: UploadFile, file_path: str, label: str, codec: Optional[str] = None) -> StoredFile:
+    """
+    The file is read in UPLOAD_CHUNK_SIZE chunks, hashed as it is written and
+    rejected with 413 once it exceeds MAX_UPLOAD_SIZE. Disk writes run in the
+    threadpool so the event loop is never blocked. With a `codec` the content
+    is compressed on the way to disk (size and checksum stay those of the
+    original content).
+    """
+    folder = os.path.dirname(file_path)
+    await run_in_threadpool(os.makedirs, folder, exist_ok=True)
+    fd, temp_path = await run_in_threadpool(
+        tempfile.mkstemp, dir=folder, prefix=f".{label}.", suffix=".part"
+    )
     
-    # Save file
-    with open(file_path, "wb") as f:
-        content = await file.read()
-        f.write(content)
+    digest = hashlib.sha256()
+    size = 0
+    stored_size = None
+    try:
+        with os.fdopen(fd, "wb") as out:
+            target = CompressingWriter(out, codec) if codec else out
+            while True:
+                chunk = await file.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > MAX_UPLOAD_SIZE:
+                    raise _too_large(label)
+                await run_in_threadpool(_write_chunk, target, digest, chunk)
+            if codec:
+                stored_size = await run_in_threadpool(target.close)
+            await run_in_threadpool(_finish_file, out)
+    except BaseException:
+        await run_in_threadpool(_remove_quietly, temp_path)
+        raise
     
-    return file_path
+    return StoredFile(path=file_path, size=size, checksum=digest.hexdigest(), temp_path=temp_path, stored_size=stored_size)
+
+# Hash an upload without writing it anywhere
+async def hash_upload(file: UploadFile, label: str) -> Tuple[str, int]:
+    """Return (sha256 hex, size) of an upload and rewind it for a later read"""
+    digest = hashlib.sha256()
+    size = 0
+    while True:
+        chunk = await file.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        size += len(chunk)
+        if size > MAX_UPLOAD_SIZE:
+            raise _too_large(label)
+        await run_in_threadpool(digest.update, chunk)
+    await file.seek(0)
+    return digest.hexdigest(), size
+
+def _too_large(label: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"{label.replace('_', ' ').title()} exceeds the {MAX_UPLOAD_SIZE // (1024 * 1024)} MB limit"
+    )
+
+# Await coroutines concurrently, at most `limit` at a time
+async def gather_bounded(coroutines: Iterable[Awaitable], limit: int = UPLOAD_CONCURRENCY) -> list:
+    """Like asyncio.gather(..., return_exceptions=True) with a concurrency cap"""
+    semaphore = asyncio.Semaphore(limit)
+    
+    async def bounded(coroutine):
+        async with semaphore:
+            return await coroutine
+    
+    return await asyncio.gather(*(bounded(coroutine) for coroutine in coroutines), return_exceptions=True)
+
+# Atomically move a staged file to its final path
+def promote_staged_file(stored: StoredFile) -> str:
+    if stored.temp_path:
+        os.replace(stored.temp_path, stored.path)
+    return stored.path
+
+# Remove a staged file that will not be used
+def discard_staged_file(stored: StoredFile):
+    if stored.temp_path:
+        _remove_quietly(stored.temp_path)
+
+# Save uploaded file
+async def save_upload_file(file: UploadFile, vendor_id: str, doc_type: str) -> str:
+    """
+    Save uploaded file and return the file path
+    doc_type: document slug used as the filename, e.g. 'pan' or 'gst_certificate'
+    """
+    stored = await stage_upload_file(file, vendor_id, doc_type)
+    try:
+        return await run_in_threadpool(promote_staged_file, stored)
+    except BaseException:
+        await run_in_threadpool(discard_staged_file, stored)
+        raise
+
+# Promote staged files and remove the files they replace (after a successful commit)
+def apply_staged_files(staged: Iterable[StoredFile], stale_paths: Iterable[Optional[str]] = ()):
+    promoted = set()
+    for stored in staged:
+        try:
+            promote_staged_file(stored)
+            promoted.add(stored.path)
+        except OSError as e:
+            print(f"Error promoting file {stored.path}: {e}")
+    for file_path in stale_paths:
+        if file_path not in promoted:
+            delete_file(file_path)
+
+# Throw away staged files (after a failed commit)
+def discard_staged_files(staged: Iterable[StoredFile]):
+    for stored in staged:
+        discard_staged_file(stored)
+
+def _write_chunk(out, digest, chunk: bytes):
+    digest.update(chunk)
+    out.write(chunk)
+
+def _finish_file(out):
+    out.flush()
+    os.fchmod(out.fileno(), 0o644)  # mkstemp creates files as 0600
+    os.fsync(out.fileno())
+
+def _remove_quietly(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
 
 # Delete file if exists
 def delete_file(file_path: Optional[str]):
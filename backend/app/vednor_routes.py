@@ -1,10 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Header, HTTPException, status, UploadFile, File, Form
+from fastapi.responses import StreamingResponse
+from collections import Counter
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import and_, delete, func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
-from database import get_db
-from models import Vendor, VendorStatus
+from database import get_async_db
+from models import Vendor, VendorDocument, VendorIdentityKey, VendorStatus, IDENTITY_PROOF_TYPES, ADDRESS_PROOF_TYPES
 from schemas import VendorCreate, VendorResponse, StatusCheckRequest, StatusCheckResponse
-from utils import generate_vendor_id, save_upload_file, delete_file
+from utils import generate_vendor_id, apply_staged_files, discard_staged_files
+from stats import adjust_status_count, stats_cache
+from vendor_cache import vendor_cache
+from documents import get_vendor_documents, vendor_response
+from blob_store import stage_blobs, adjust_blob_refs, is_blob_path
+from identity import identity_keys, identity_key_rows, find_identity_matches, duplicate_identity_message
+from jobs import enqueue_document_jobs, job_dispatcher
+from previews import variant_paths
+from audit import audit_log
+from events import SSE_HEADERS, event_hub, parse_last_event_id
 
 router = APIRouter(prefix="/api/vendor", tags=["Vendor"])
 
@@ -84,12 +98,13 @@ async def register_vendor(
     # Additional Notes
     notes: Optional[str] = Form(None),
     
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Register a new vendor with complete KYC information"""
     
     # Check if email already exists
-    existing_vendor = db.query(Vendor).filter(Vendor.email == email).first()
+    result = await db.execute(select(Vendor.id).where(Vendor.email == email))
+    existing_vendor = result.first()
     if existing_vendor:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -103,9 +118,21 @@ async def register_vendor(
             detail="Invalid age. Age must be between 1 and 150"
         )
     
+    # Check PAN / Aadhaar / GST / phone against registered vendors (one indexed query)
+    keys = identity_keys({
+        "pan_number": pan_number, "aadhaar_number": aadhaar_number,
+        "gst_number": gst_number, "phone": phone,
+    })
+    message = duplicate_identity_message(keys, await find_identity_matches(db, list(keys.values())))
+    if message:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=message
+        )
+    
     # Generate unique sequential vendor ID
     try:
-        vendor_id = generate_vendor_id(db)
+        vendor_id = await generate_vendor_id(db)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -182,15 +209,20 @@ async def register_vendor(
     
     try:
         db.add(new_vendor)
-        db.commit()
-        db.refresh(new_vendor)
+        db.add_all(VendorIdentityKey(**row) for row in identity_key_rows(vendor_id, keys))
+        await adjust_status_count(db, VendorStatus.PENDING, 1)
+        await db.commit()
+        stats_cache.clear()
+        await db.refresh(new_vendor)
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to create vendor: {str(e)}"
         )
     
+    await audit_log.record(vendor_id, "registered", "vendor")
+    event_hub.publish("registered", {"vendor_id": vendor_id, "status": VendorStatus.PENDING.value}, vendor_id)
     return new_vendor
 
 # 2. Upload KYC Documents
@@ -234,254 +266,214 @@ async def upload_documents(
     overseas_address_proof: Optional[UploadFile] = File(None),  # For NRI/OCI
     fatca_declaration_document: Optional[UploadFile] = File(None),  # For NRI/OCI
     
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Upload KYC documents for a vendor"""
     
     # Find vendor
-    vendor = db.query(Vendor).filter(Vendor.vendor_id == vendor_id).first()
+    result = await db.execute(select(Vendor).where(Vendor.vendor_id == vendor_id))
+    vendor = result.scalars().first()
     if not vendor:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Vendor not found"
         )
     
-    # Save documents
-    try:
-        # Identity Proof Documents (Only ONE allowed - clear others when one is uploaded)
-        identity_proof_uploaded = False
-        if aadhaar_document:
-            # Clear all other identity proof documents and delete their files
-            delete_file(vendor.pan_document)
-            delete_file(vendor.passport_document)
-            delete_file(vendor.voter_id_document)
-            delete_file(vendor.driving_license_document)
-            vendor.pan_document = None
-            vendor.passport_document = None
-            vendor.voter_id_document = None
-            vendor.driving_license_document = None
-            vendor.aadhaar_document = await save_upload_file(aadhaar_document, vendor_id, "aadhaar")
-            identity_proof_uploaded = True
-        elif pan_document:
-            # Clear all other identity proof documents and delete their files
-            delete_file(vendor.aadhaar_document)
-            delete_file(vendor.passport_document)
-            delete_file(vendor.voter_id_document)
-            delete_file(vendor.driving_license_document)
-            vendor.aadhaar_document = None
-            vendor.passport_document = None
-            vendor.voter_id_document = None
-            vendor.driving_license_document = None
-            vendor.pan_document = await save_upload_file(pan_document, vendor_id, "pan")
-            identity_proof_uploaded = True
-        elif passport_document:
-            # Clear all other identity proof documents and delete their files
-            delete_file(vendor.aadhaar_document)
-            delete_file(vendor.pan_document)
-            delete_file(vendor.voter_id_document)
-            delete_file(vendor.driving_license_document)
-            vendor.aadhaar_document = None
-            vendor.pan_document = None
-            vendor.voter_id_document = None
-            vendor.driving_license_document = None
-            vendor.passport_document = await save_upload_file(passport_document, vendor_id, "passport")
-            identity_proof_uploaded = True
-        elif voter_id_document:
-            # Clear all other identity proof documents and delete their files
-            delete_file(vendor.aadhaar_document)
-            delete_file(vendor.pan_document)
-            delete_file(vendor.passport_document)
-            delete_file(vendor.driving_license_document)
-            vendor.aadhaar_document = None
-            vendor.pan_document = None
-            vendor.passport_document = None
-            vendor.driving_license_document = None
-            vendor.voter_id_document = await save_upload_file(voter_id_document, vendor_id, "voter_id")
-            identity_proof_uploaded = True
-        elif driving_license_document:
-            # Clear all other identity proof documents and delete their files
-            delete_file(vendor.aadhaar_document)
-            delete_file(vendor.pan_document)
-            delete_file(vendor.passport_document)
-            delete_file(vendor.voter_id_document)
-            vendor.aadhaar_document = None
-            vendor.pan_document = None
-            vendor.passport_document = None
-            vendor.voter_id_document = None
-            vendor.driving_license_document = await save_upload_file(driving_license_document, vendor_id, "driving_license")
-            identity_proof_uploaded = True
-        
-        # Address Proof Documents (Only ONE allowed - clear others when one is uploaded)
-        address_proof_uploaded = False
-        if address_proof_aadhaar:
-            # Clear all other address proof documents and delete their files
-            delete_file(vendor.address_proof_passport)
-            delete_file(vendor.address_proof_voter_id)
-            delete_file(vendor.address_proof_driving_license)
-            delete_file(vendor.address_proof_electricity_bill)
-            delete_file(vendor.address_proof_water_gas_bill)
-            delete_file(vendor.address_proof_bank_statement)
-            vendor.address_proof_passport = None
-            vendor.address_proof_voter_id = None
-            vendor.address_proof_driving_license = None
-            vendor.address_proof_electricity_bill = None
-            vendor.address_proof_water_gas_bill = None
-            vendor.address_proof_bank_statement = None
-            vendor.address_proof_aadhaar = await save_upload_file(address_proof_aadhaar, vendor_id, "address_proof_aadhaar")
-            address_proof_uploaded = True
-        elif address_proof_passport:
-            # Clear all other address proof documents and delete their files
-            delete_file(vendor.address_proof_aadhaar)
-            delete_file(vendor.address_proof_voter_id)
-            delete_file(vendor.address_proof_driving_license)
-            delete_file(vendor.address_proof_electricity_bill)
-            delete_file(vendor.address_proof_water_gas_bill)
-            delete_file(vendor.address_proof_bank_statement)
-            vendor.address_proof_aadhaar = None
-            vendor.address_proof_voter_id = None
-            vendor.address_proof_driving_license = None
-            vendor.address_proof_electricity_bill = None
-            vendor.address_proof_water_gas_bill = None
-            vendor.address_proof_bank_statement = None
-            vendor.address_proof_passport = await save_upload_file(address_proof_passport, vendor_id, "address_proof_passport")
-            address_proof_uploaded = True
-        elif address_proof_voter_id:
-            # Clear all other address proof documents and delete their files
-            delete_file(vendor.address_proof_aadhaar)
-            delete_file(vendor.address_proof_passport)
-            delete_file(vendor.address_proof_driving_license)
-            delete_file(vendor.address_proof_electricity_bill)
-            delete_file(vendor.address_proof_water_gas_bill)
-            delete_file(vendor.address_proof_bank_statement)
-            vendor.address_proof_aadhaar = None
-            vendor.address_proof_passport = None
-            vendor.address_proof_driving_license = None
-            vendor.address_proof_electricity_bill = None
-            vendor.address_proof_water_gas_bill = None
-            vendor.address_proof_bank_statement = None
-            vendor.address_proof_voter_id = await save_upload_file(address_proof_voter_id, vendor_id, "address_proof_voter_id")
-            address_proof_uploaded = True
-        elif address_proof_driving_license:
-            # Clear all other address proof documents and delete their files
-            delete_file(vendor.address_proof_aadhaar)
-            delete_file(vendor.address_proof_passport)
-            delete_file(vendor.address_proof_voter_id)
-            delete_file(vendor.address_proof_electricity_bill)
-            delete_file(vendor.address_proof_water_gas_bill)
-            delete_file(vendor.address_proof_bank_statement)
-            vendor.address_proof_aadhaar = None
-            vendor.address_proof_passport = None
-            vendor.address_proof_voter_id = None
-            vendor.address_proof_electricity_bill = None
-            vendor.address_proof_water_gas_bill = None
-            vendor.address_proof_bank_statement = None
-            vendor.address_proof_driving_license = await save_upload_file(address_proof_driving_license, vendor_id, "address_proof_driving_license")
-            address_proof_uploaded = True
-        elif address_proof_electricity_bill:
-            # Clear all other address proof documents and delete their files
-            delete_file(vendor.address_proof_aadhaar)
-            delete_file(vendor.address_proof_passport)
-            delete_file(vendor.address_proof_voter_id)
-            delete_file(vendor.address_proof_driving_license)
-            delete_file(vendor.address_proof_water_gas_bill)
-            delete_file(vendor.address_proof_bank_statement)
-            vendor.address_proof_aadhaar = None
-            vendor.address_proof_passport = None
-            vendor.address_proof_voter_id = None
-            vendor.address_proof_driving_license = None
-            vendor.address_proof_water_gas_bill = None
-            vendor.address_proof_bank_statement = None
-            vendor.address_proof_electricity_bill = await save_upload_file(address_proof_electricity_bill, vendor_id, "address_proof_electricity_bill")
-            address_proof_uploaded = True
-        elif address_proof_water_gas_bill:
-            # Clear all other address proof documents and delete their files
-            delete_file(vendor.address_proof_aadhaar)
-            delete_file(vendor.address_proof_passport)
-            delete_file(vendor.address_proof_voter_id)
-            delete_file(vendor.address_proof_driving_license)
-            delete_file(vendor.address_proof_electricity_bill)
-            delete_file(vendor.address_proof_bank_statement)
-            vendor.address_proof_aadhaar = None
-            vendor.address_proof_passport = None
-            vendor.address_proof_voter_id = None
-            vendor.address_proof_driving_license = None
-            vendor.address_proof_electricity_bill = None
-            vendor.address_proof_bank_statement = None
-            vendor.address_proof_water_gas_bill = await save_upload_file(address_proof_water_gas_bill, vendor_id, "address_proof_water_gas_bill")
-            address_proof_uploaded = True
-        elif address_proof_bank_statement:
-            # Clear all other address proof documents and delete their files
-            delete_file(vendor.address_proof_aadhaar)
-            delete_file(vendor.address_proof_passport)
-            delete_file(vendor.address_proof_voter_id)
-            delete_file(vendor.address_proof_driving_license)
-            delete_file(vendor.address_proof_electricity_bill)
-            delete_file(vendor.address_proof_water_gas_bill)
-            vendor.address_proof_aadhaar = None
-            vendor.address_proof_passport = None
-            vendor.address_proof_voter_id = None
-            vendor.address_proof_driving_license = None
-            vendor.address_proof_electricity_bill = None
-            vendor.address_proof_water_gas_bill = None
-            vendor.address_proof_bank_statement = await save_upload_file(address_proof_bank_statement, vendor_id, "address_proof_bank_statement")
-            address_proof_uploaded = True
-        
+    files = {
+        # Identity Proof Documents
+        "aadhaar": aadhaar_document,
+        "pan": pan_document,
+        "passport": passport_document,
+        "voter_id": voter_id_document,
+        "driving_license": driving_license_document,
+        # Address Proof Documents
+        "address_proof_aadhaar": address_proof_aadhaar,
+        "address_proof_passport": address_proof_passport,
+        "address_proof_voter_id": address_proof_voter_id,
+        "address_proof_driving_license": address_proof_driving_license,
+        "address_proof_electricity_bill": address_proof_electricity_bill,
+        "address_proof_water_gas_bill": address_proof_water_gas_bill,
+        "address_proof_bank_statement": address_proof_bank_statement,
         # Photograph
-        if passport_photo:
-            vendor.passport_photo = await save_upload_file(passport_photo, vendor_id, "passport_photo")
-        if live_selfie:
-            vendor.live_selfie = await save_upload_file(live_selfie, vendor_id, "live_selfie")
-        
+        "passport_photo": passport_photo,
+        "live_selfie": live_selfie,
         # Business Documents
-        if gst_certificate:
-            vendor.gst_certificate = await save_upload_file(gst_certificate, vendor_id, "gst_certificate")
-        if partnership_deed:
-            vendor.partnership_deed = await save_upload_file(partnership_deed, vendor_id, "partnership_deed")
-        if certificate_of_incorporation:
-            vendor.certificate_of_incorporation = await save_upload_file(certificate_of_incorporation, vendor_id, "certificate_of_incorporation")
-        if memorandum_articles:
-            vendor.memorandum_articles = await save_upload_file(memorandum_articles, vendor_id, "memorandum_articles")
-        if shop_establishment_certificate:
-            vendor.shop_establishment_certificate = await save_upload_file(shop_establishment_certificate, vendor_id, "shop_establishment_certificate")
-        
+        "gst_certificate": gst_certificate,
+        "partnership_deed": partnership_deed,
+        "certificate_of_incorporation": certificate_of_incorporation,
+        "memorandum_articles": memorandum_articles,
+        "shop_establishment_certificate": shop_establishment_certificate,
         # Additional Documents
-        if college_id_document:
-            vendor.college_id_document = await save_upload_file(college_id_document, vendor_id, "college_id_document")
-        if local_address_proof:
-            vendor.local_address_proof = await save_upload_file(local_address_proof, vendor_id, "local_address_proof")
-        if guardians_kyc_documents:
-            vendor.guardians_kyc_documents = await save_upload_file(guardians_kyc_documents, vendor_id, "guardians_kyc_documents")
-        if birth_certificate_document:
-            vendor.birth_certificate_document = await save_upload_file(birth_certificate_document, vendor_id, "birth_certificate_document")
-        if visa_document:
-            vendor.visa_document = await save_upload_file(visa_document, vendor_id, "visa_document")
-        if oci_card_document:
-            vendor.oci_card_document = await save_upload_file(oci_card_document, vendor_id, "oci_card_document")
-        if overseas_address_proof:
-            vendor.overseas_address_proof = await save_upload_file(overseas_address_proof, vendor_id, "overseas_address_proof")
-        if fatca_declaration_document:
-            vendor.fatca_declaration_document = await save_upload_file(fatca_declaration_document, vendor_id, "fatca_declaration_document")
-        
-        db.commit()
-        db.refresh(vendor)
+        "college_id_document": college_id_document,
+        "local_address_proof": local_address_proof,
+        "guardians_kyc_documents": guardians_kyc_documents,
+        "birth_certificate_document": birth_certificate_document,
+        "visa_document": visa_document,
+        "oci_card_document": oci_card_document,
+        "overseas_address_proof": overseas_address_proof,
+        "fatca_declaration_document": fatca_declaration_document,
+    }
+    uploads = {doc_type: (file, doc_type) for doc_type, file in files.items() if file}
+    
+    # Identity and address proofs: only ONE of each is kept - the first one
+    # uploaded (in priority order) wins and the others in its group are cleared
+    cleared_types = []
+    for group in (IDENTITY_PROOF_TYPES, ADDRESS_PROOF_TYPES):
+        chosen = next((doc_type for doc_type in group if doc_type in uploads), None)
+        if chosen:
+            for doc_type in group:
+                if doc_type != chosen:
+                    uploads.pop(doc_type, None)
+                    cleared_types.append(doc_type)
+    
+    # Hash everything first; only content the blob store lacks is written,
+    # and nothing new is visible on disk until commit
+    try:
+        staged = await stage_blobs(db, uploads)
+    except HTTPException:
+        raise
     except Exception as e:
-        db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to upload documents: {str(e)}"
         )
     
-    return vendor
+    existing = await get_vendor_documents(db, vendor_id)
+    stale_paths = []
+    blob_refs = Counter()
+    
+    def release(document):
+        # Blobs are shared and reference counted; legacy per-vendor files are not
+        if is_blob_path(document.path):
+            blob_refs[document.checksum] -= 1
+        else:
+            stale_paths.extend([document.path, *variant_paths(document.path)])
+    
+    # Removals and replacements only apply to the document as read above: one
+    # that a concurrent upload changed first matches no row (a conflict), so
+    # its blob references are never released twice
+    def unchanged(document):
+        return and_(
+            VendorDocument.id == document.id,
+            VendorDocument.path == document.path,
+            VendorDocument.checksum.is_not_distinct_from(document.checksum),
+        )
+    
+    changed = False
+    guarded = []
+    written = []  # (doc_type, new content, document it replaces or None)
+    audit_details = {"added": [], "replaced": [], "removed": []}
+    for doc_type in cleared_types:
+        document = existing.get(doc_type)
+        if document:
+            release(document)
+            guarded.append(delete(VendorDocument).where(unchanged(document)))
+            changed = True
+            audit_details["removed"].append({"doc_type": doc_type, "checksum": document.checksum})
+    for doc_type, stored in staged.items():
+        document = existing.get(doc_type)
+        if document and document.checksum == stored.checksum and document.path == stored.path:
+            continue  # Same content re-uploaded
+        blob_refs[stored.checksum] += 1
+        changed = True
+        written.append((doc_type, stored, document))
+        if document:
+            audit_details["replaced"].append(
+                {"doc_type": doc_type, "checksum": stored.checksum, "previous_checksum": document.checksum}
+            )
+            release(document)
+        else:
+            audit_details["added"].append({"doc_type": doc_type, "checksum": stored.checksum})
+    
+    try:
+        # Blob rows first: documents take the path from the same statement that adds their
+        # reference, so a path changed meanwhile (compress_blobs) is never written
+        blob_paths, replaced_blobs = await adjust_blob_refs(
+            db, blob_refs, {stored.checksum: stored for stored in staged.values()}
+        )
+        stale_paths.extend(replaced_blobs)
+        processing = []
+        for doc_type, stored, document in written:
+            path = blob_paths[stored.checksum]
+            processing.append((doc_type, path, stored.checksum))
+            if document:
+                guarded.append(
+                    update(VendorDocument).where(unchanged(document))
+                    .values(path=path, size=stored.size, checksum=stored.checksum, uploaded_at=func.now())
+                )
+            else:
+                db.add(VendorDocument(
+                    vendor_id=vendor_id, doc_type=doc_type, path=path, size=stored.size, checksum=stored.checksum
+                ))
+        for statement in guarded:
+            result = await db.execute(statement.execution_options(synchronize_session=False))
+            if not result.rowcount:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="Documents were changed by another upload, please retry"
+                )
+        # Checks on the new files run in the background (jobs.py)
+        await enqueue_document_jobs(db, vendor_id, processing)
+        if changed:
+            vendor.updated_at = func.now()
+        await db.commit()
+    except HTTPException:
+        await db.rollback()
+        await run_in_threadpool(discard_staged_files, staged.values())
+        raise
+    except IntegrityError:
+        # A concurrent upload added one of these document types first
+        await db.rollback()
+        await run_in_threadpool(discard_staged_files, staged.values())
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Documents were changed by another upload, please retry"
+        )
+    except Exception as e:
+        await db.rollback()
+        await run_in_threadpool(discard_staged_files, staged.values())
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to upload documents: {str(e)}"
+        )
+    
+    # Committed - move the new files into place and drop replaced ones; content
+    # another upload stored first (under another name) is not needed
+    unused = [stored for stored in staged.values()
+              if stored.checksum in blob_paths and blob_paths[stored.checksum] != stored.path]
+    await run_in_threadpool(discard_staged_files, unused)
+    kept = [stored for stored in staged.values() if stored not in unused]
+    await run_in_threadpool(apply_staged_files, kept, stale_paths)
+    await vendor_cache.invalidate(vendor_id)
+    if processing:
+        job_dispatcher.notify()
+    if changed:
+        await audit_log.record(vendor_id, "documents_uploaded", "vendor",
+                               details={key: value for key, value in audit_details.items() if value})
+        event_hub.publish("documents_uploaded", {"vendor_id": vendor_id, **audit_details}, vendor_id)
+    await db.refresh(vendor)
+    
+    return await vendor_response(db, vendor)
+
+# Load a vendor as a cacheable VendorResponse dict
+async def _load_vendor_response(db: AsyncSession, vendor_id: str):
+    result = await db.execute(select(Vendor).where(Vendor.vendor_id == vendor_id))
+    vendor = result.scalars().first()
+    if not vendor:
+        return None
+    return VendorResponse.model_validate(await vendor_response(db, vendor)).model_dump(mode="json")
 
 # 3. Check Status by Vendor ID
 @router.post("/check-status", response_model=StatusCheckResponse)
 async def check_status(
     request: StatusCheckRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Check vendor application status"""
     
-    vendor = db.query(Vendor).filter(Vendor.vendor_id == request.vendor_id).first()
+    vendor = await vendor_cache.get_or_load(
+        request.vendor_id, lambda: _load_vendor_response(db, request.vendor_id)
+    )
     if not vendor:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -489,27 +481,58 @@ async def check_status(
         )
     
     return StatusCheckResponse(
-        vendor_id=vendor.vendor_id,
-        name=vendor.name,
-        business_name=vendor.business_name or "N/A",
-        status=vendor.status,
-        rejection_reason=vendor.rejection_reason,
-        created_at=vendor.created_at
+        vendor_id=vendor["vendor_id"],
+        name=vendor["name"],
+        business_name=vendor["business_name"] or "N/A",
+        status=vendor["status"],
+        rejection_reason=vendor["rejection_reason"],
+        created_at=vendor["created_at"]
     )
 
 # 4. Get Vendor Details by ID (for vendor to view their own info)
 @router.get("/{vendor_id}", response_model=VendorResponse)
 async def get_vendor_details(
     vendor_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get vendor details by vendor ID"""
     
-    vendor = db.query(Vendor).filter(Vendor.vendor_id == vendor_id).first()
+    vendor = await vendor_cache.get_or_load(vendor_id, lambda: _load_vendor_response(db, vendor_id))
+    if not vendor:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Vendor not found"
+        )
+    
+    return vendor
+
+# 5. Stream Status Events (instead of polling check-status)
+@router.get("/{vendor_id}/events")
+async def stream_vendor_events(
+    vendor_id: str,
+    last_event_id: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Server-sent events: the current status, then status changes and uploads as they happen"""
+    
+    # Changes committed while the snapshot loads are replayed, not missed
+    since = parse_last_event_id(last_event_id)
+    if since is None:
+        since = event_hub.last_event_id
+    vendor = await vendor_cache.get_or_load(vendor_id, lambda: _load_vendor_response(db, vendor_id))
     if not vendor:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Vendor not found"
         )
+    # The stream outlives the request; don't hold a database connection for it
+    await db.close()
     
-    return vendor
\ No newline at end of file
+    snapshot = ("status", {
+        "vendor_id": vendor_id, "status": vendor["status"], "rejection_reason": vendor["rejection_reason"],
+    })
+    return StreamingResponse(
+        event_hub.stream(vendor_id, snapshot, since),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
\ No newline at end of file
@@ -0,0 +1,105 @@
+import json
+import os
+from typing import Any, Awaitable, Callable, Dict, Optional
+from cache import TTLCache
+
+# Vendor lookups polled by /check-status and GET /api/vendor/{vendor_id}.
+# Entries are invalidated when the vendor changes; the TTL only bounds how long
+# other workers can serve a stale entry when no shared backend is configured.
+VENDOR_CACHE_TTL_SECONDS = int(os.getenv("VENDOR_CACHE_TTL_SECONDS", "30"))
+VENDOR_CACHE_SIZE = int(os.getenv("VENDOR_CACHE_SIZE", "10000"))
+REDIS_URL = os.getenv("REDIS_URL")  # Shared cache across workers (optional)
+
+# In-process backend (also the stand-in when no shared backend is configured)
+class LocalCacheBackend:
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+    
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self._cache.get(key)
+    
+    async def set(self, key: str, value: Dict[str, Any], ttl: float):
+        self._cache.set(key, value, ttl=ttl)
+    
+    async def delete(self, key: str):
+        self._cache.delete(key)
+    
+    def size(self) -> Optional[int]:
+        return len(self._cache)
+
+# Redis backend shared by all workers
+class RedisCacheBackend:
+    def __init__(self, url: str):
+        import redis.asyncio as redis  # Optional dependency, only needed with REDIS_URL
+        self._client = redis.from_url(url)
+    
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        raw = await self._client.get(key)
+        return json.loads(raw) if raw is not None else None
+    
+    async def set(self, key: str, value: Dict[str, Any], ttl: float):
+        await self._client.set(key, json.dumps(value, default=str), ex=max(1, int(ttl)))
+    
+    async def delete(self, key: str):
+        await self._client.delete(key)
+    
+    def size(self) -> Optional[int]:
+        return None
+
+# Read-through vendor cache
+class VendorCache:
+    """
+    Caches the serialized VendorResponse of each vendor.
+    get_or_load() serves from the backend or calls `loader` on a miss;
+    invalidate() must be called after any commit that changes the vendor.
+    """
+    
+    def __init__(self, backend, ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._epoch = 0  # Bumped on every invalidation
+    
+    @staticmethod
+    def _key(vendor_id: str) -> str:
+        return f"vendor:{vendor_id}"
+    
+    async def get_or_load(self, vendor_id: str, loader: Callable[[], Awaitable[Optional[Dict[str, Any]]]]):
+        key = self._key(vendor_id)
+        value = await self.backend.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        
+        self.misses += 1
+        epoch = self._epoch
+        value = await loader()
+        # Skip caching if an invalidation ran while loading (value may be stale)
+        if value is not None and epoch == self._epoch:
+            await self.backend.set(key, value, self.ttl)
+        return value
+    
+    async def invalidate(self, vendor_id: str):
+        self._epoch += 1
+        await self.backend.delete(self._key(vendor_id))
+    
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": "redis" if isinstance(self.backend, RedisCacheBackend) else "local",
+            "size": self.backend.size(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+def _make_backend():
+    if REDIS_URL:
+        try:
+            return RedisCacheBackend(REDIS_URL)
+        except ImportError:
+            print("⚠️  REDIS_URL is set but the redis package is not installed - using the local vendor cache")
+    return LocalCacheBackend(maxsize=VENDOR_CACHE_SIZE, ttl=VENDOR_CACHE_TTL_SECONDS)
+
+vendor_cache = VendorCache(_make_backend(), ttl=VENDOR_CACHE_TTL_SECONDS)
@@ -0,0 +1,117 @@
+"""
+Benchmark: sync SQLAlchemy sessions inside async handlers vs. the async session layer.
+
+Simulates concurrent API requests (vendor lookup + first page of the admin
+list) against a scratch SQLite database and reports throughput together with
+event-loop lag, i.e. how long other in-flight requests are stalled.
+
+Run from backend/app:
+    python ../benchmarks/db_concurrency.py --vendors 20000 --requests 2000 --concurrency 50
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from sqlalchemy import create_engine, select, insert
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+from database import Base, async_url
+from models import Vendor, VendorStatus
+
+# Fill a scratch database with vendors
+def seed(url: str, count: int):
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    rows = [
+        {
+            "vendor_id": f"VEN{i:06d}", "name": f"Vendor {i}", "age": 30, "date_of_birth": "1990-01-01",
+            "email": f"vendor{i}@example.com", "phone": "9999999999", "current_address": "Street 1",
+            "status": random.choice(list(VendorStatus)),
+        }
+        for i in range(1, count + 1)
+    ]
+    with engine.begin() as conn:
+        conn.execute(insert(Vendor), rows)
+    engine.dispose()
+
+# Measure the worst delay of a 5 ms ticker while the load runs
+async def loop_lag(stop: asyncio.Event, samples: list):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(0.005)
+        samples.append(time.perf_counter() - started - 0.005)
+
+async def run(name: str, handler, total: int, vendors: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    
+    async def one():
+        async with semaphore:
+            started = time.perf_counter()
+            await handler(f"VEN{random.randint(1, vendors):06d}")
+            latencies.append(time.perf_counter() - started)
+    
+    stop, lag = asyncio.Event(), []
+    ticker = asyncio.create_task(loop_lag(stop, lag))
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await ticker
+    
+    latencies.sort()
+    print(f"{name:6s} {total / elapsed:8.0f} req/s   "
+          f"p50 {statistics.median(latencies) * 1000:7.2f} ms   "
+          f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:7.2f} ms   "
+          f"max loop lag {max(lag or [0]) * 1000:7.2f} ms")
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--vendors", type=int, default=20000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+    
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    url = f"sqlite:///{path}"
+    seed(url, args.vendors)
+    
+    list_query = select(Vendor.id, Vendor.vendor_id, Vendor.name, Vendor.status, Vendor.created_at) \
+        .order_by(Vendor.created_at.desc(), Vendor.id.desc()).limit(50)
+    
+    # Current path before the async layer: sync Session called from async def
+    sync_engine = create_engine(url, connect_args={"check_same_thread": False})
+    SyncSession = sessionmaker(bind=sync_engine)
+    
+    async def sync_handler(vendor_id: str):
+        db = SyncSession()
+        try:
+            db.execute(select(Vendor).where(Vendor.vendor_id == vendor_id)).scalars().first()
+            db.execute(list_query).all()
+        finally:
+            db.close()
+    
+    # Async session layer used by the routes
+    async_engine = create_async_engine(async_url(url))
+    AsyncSession = async_sessionmaker(async_engine)
+    
+    async def async_handler(vendor_id: str):
+        async with AsyncSession() as db:
+            (await db.execute(select(Vendor).where(Vendor.vendor_id == vendor_id))).scalars().first()
+            (await db.execute(list_query)).all()
+    
+    await run("sync", sync_handler, args.requests, args.vendors, args.concurrency)
+    await run("async", async_handler, args.requests, args.vendors, args.concurrency)
+    
+    sync_engine.dispose()
+    await async_engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
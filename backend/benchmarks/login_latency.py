@@ -0,0 +1,83 @@
+"""
+Benchmark: API latency while admin logins run in parallel.
+
+Fires bursts of /api/admin/login requests and, at the same time, a steady
+stream of cheap vendor requests (/api/vendor/check-status). Reports the
+vendor request latency with bcrypt run inline on the event loop vs. on the
+dedicated bcrypt pool.
+
+Run from backend/app:
+    python ../benchmarks/login_latency.py --logins 40 --probes 200
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+import httpx
+import auth
+from database import SessionLocal
+from models import Admin
+from main import app
+
+PASSWORD = "bench-password"
+
+def create_admin():
+    db = SessionLocal()
+    try:
+        if not db.query(Admin).filter(Admin.username == "bench").first():
+            db.add(Admin(username="bench", hashed_password=auth.get_password_hash(PASSWORD)))
+            db.commit()
+    finally:
+        db.close()
+
+async def measure(client: httpx.AsyncClient, logins: int, probes: int):
+    latencies = []
+    
+    async def login():
+        await client.post("/api/admin/login", json={"username": "bench", "password": PASSWORD})
+    
+    async def probe():
+        for _ in range(probes):
+            started = time.perf_counter()
+            await client.post("/api/vendor/check-status", json={"vendor_id": "VEN999999"})
+            latencies.append(time.perf_counter() - started)
+            await asyncio.sleep(0.005)
+    
+    started = time.perf_counter()
+    await asyncio.gather(probe(), *(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+    
+    latencies.sort()
+    return elapsed, statistics.median(latencies), latencies[int(len(latencies) * 0.99) - 1], latencies[-1]
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--probes", type=int, default=200)
+    args = parser.parse_args()
+    
+    create_admin()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        offloaded = auth.verify_password_async
+        
+        async def verify_inline(plain_password, hashed_password):
+            return auth.verify_password(plain_password, hashed_password)
+        
+        for name, verify in (("inline", verify_inline), ("pool", offloaded)):
+            auth.verify_password_async = verify
+            elapsed, p50, p99, worst = await measure(client, args.logins, args.probes)
+            print(f"{name:6s} total {elapsed:6.2f} s   probe p50 {p50 * 1000:7.2f} ms   "
+                  f"p99 {p99 * 1000:7.2f} ms   max {worst * 1000:7.2f} ms")
+        auth.verify_password_async = offloaded
+    auth.shutdown_password_executor()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,91 @@
+"""
+Shared fixtures: the app runs against a scratch SQLite database and upload
+directory, without job worker processes.
+
+Run from backend:
+    python -m pytest -q
+"""
+import itertools
+import os
+import shutil
+import sys
+import tempfile
+from contextlib import contextmanager
+
+import pytest
+
+# Configured before any app module reads the environment
+SCRATCH_DIR = tempfile.mkdtemp(prefix="vendor-kyc-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(SCRATCH_DIR, 'vendors.db')}"
+os.environ["JOB_WORKERS"] = "0"
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+import blob_store
+import utils
+from database import async_engine, engine
+
+_vendor_numbers = itertools.count(1)
+
+@pytest.fixture(scope="session")
+def client():
+    patch = pytest.MonkeyPatch()
+    upload_dir = os.path.join(SCRATCH_DIR, "uploads")
+    patch.setattr(utils, "UPLOAD_DIR", upload_dir)
+    patch.setattr(blob_store, "BLOB_DIR", os.path.join(upload_dir, "blobs"))
+    import main
+    
+    with TestClient(main.app) as test_client:
+        yield test_client
+    patch.undo()
+    engine.dispose()
+    shutil.rmtree(SCRATCH_DIR, ignore_errors=True)
+
+@pytest.fixture(scope="session")
+def admin_headers(client):
+    response = client.post("/api/admin/login", json={"username": "admin", "password": "admin123"})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+# Register a vendor with unique identity fields and return its vendor_id
+@pytest.fixture
+def register_vendor(client):
+    def register(**fields):
+        number = next(_vendor_numbers)
+        data = {
+            "name": f"Vendor {number}", "age": 30, "date_of_birth": "1990-01-01",
+            "email": f"vendor{number}@example.com", "phone": f"9{number:09d}",
+            "current_address": "1 Test Street", "business_name": f"Business {number}",
+        }
+        data.update(fields)
+        response = client.post("/api/vendor/register", data=data)
+        assert response.status_code == 201, response.text
+        return response.json()["vendor_id"]
+    return register
+
+# Upload documents as {field: content}, e.g. {"pan_document": b"%PDF-1.4 ..."}
+@pytest.fixture
+def upload(client):
+    def upload_files(vendor_id: str, documents: dict):
+        files = {field: (f"{field}.pdf", content, "application/pdf") for field, content in documents.items()}
+        return client.post(f"/api/vendor/upload-documents/{vendor_id}", files=files)
+    return upload_files
+
+# Run `action` (a sync callable) once, when the API first executes a statement
+# starting with `sql_prefix` - just before it, or just after it with after=True
+@contextmanager
+def on_statement(sql_prefix: str, action, after: bool = False):
+    fired = []
+    
+    def hook(conn, cursor, statement, parameters, context, executemany):
+        if not fired and statement.lstrip().upper().startswith(sql_prefix.upper()):
+            fired.append(statement)
+            action()
+    
+    identifier = "after_cursor_execute" if after else "before_cursor_execute"
+    event.listen(async_engine.sync_engine, identifier, hook)
+    try:
+        yield fired
+    finally:
+        event.remove(async_engine.sync_engine, identifier, hook)
\ No newline at end of file
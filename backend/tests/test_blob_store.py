@@ -0,0 +1,93 @@
+"""
+Content-addressed document storage: identical uploads share one blob, and
+blobs nobody references are collected after the grace period.
+"""
+import hashlib
+import os
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, update
+
+from blob_store import collect_garbage
+from database import engine
+from models import DocumentBlob, VendorDocument
+
+def blob_row(checksum: str):
+    with engine.connect() as conn:
+        return conn.execute(
+            select(DocumentBlob.path, DocumentBlob.ref_count).where(DocumentBlob.checksum == checksum)
+        ).first()
+
+def document_path(vendor_id: str, doc_type: str) -> str:
+    with engine.connect() as conn:
+        return conn.execute(
+            select(VendorDocument.path)
+            .where(VendorDocument.vendor_id == vendor_id, VendorDocument.doc_type == doc_type)
+        ).scalar_one()
+
+def test_identical_uploads_share_one_blob(client, register_vendor, upload):
+    content = b"%PDF-1.4 shared certificate"
+    checksum = hashlib.sha256(content).hexdigest()
+    first, second = register_vendor(), register_vendor()
+    
+    assert upload(first, {"gst_certificate": content}).status_code == 200
+    assert upload(second, {"gst_certificate": content}).status_code == 200
+    path, ref_count = blob_row(checksum)
+    assert ref_count == 2
+    assert document_path(first, "gst_certificate") == document_path(second, "gst_certificate") == path
+    with open(path, "rb") as f:
+        assert f.read() == content
+    
+    # Re-uploading the same content changes nothing
+    assert upload(first, {"gst_certificate": content}).status_code == 200
+    assert blob_row(checksum).ref_count == 2
+    
+    assert upload(first, {"gst_certificate": b"%PDF-1.4 renewed certificate"}).status_code == 200
+    assert blob_row(checksum) == (path, 1)
+    assert os.path.exists(path)
+
+def test_garbage_collection_waits_for_grace_period(client, register_vendor, upload):
+    old, new = b"%PDF-1.4 expired licence", b"%PDF-1.4 current licence"
+    old_checksum, new_checksum = hashlib.sha256(old).hexdigest(), hashlib.sha256(new).hexdigest()
+    vendor_id = register_vendor()
+    assert upload(vendor_id, {"driving_license_document": old}).status_code == 200
+    assert upload(vendor_id, {"driving_license_document": new}).status_code == 200
+    old_path, ref_count = blob_row(old_checksum)
+    assert ref_count == 0
+    
+    # Unreferenced, but only just: kept
+    collect_garbage(engine)
+    assert blob_row(old_checksum) is not None
+    assert os.path.exists(old_path)
+    
+    with engine.begin() as conn:
+        conn.execute(
+            update(DocumentBlob).where(DocumentBlob.checksum.in_([old_checksum, new_checksum]))
+            .values(updated_at=datetime.now(timezone.utc) - timedelta(days=1))
+        )
+    assert collect_garbage(engine) >= 1
+    assert blob_row(old_checksum) is None
+    assert not os.path.exists(old_path)
+    # Still referenced: kept however old
+    new_path, ref_count = blob_row(new_checksum)
+    assert ref_count == 1
+    assert os.path.exists(new_path)
+
+def test_garbage_collection_keeps_blob_referenced_again(client, register_vendor, upload):
+    content = b"%PDF-1.4 reused statement"
+    checksum = hashlib.sha256(content).hexdigest()
+    first, second = register_vendor(), register_vendor()
+    assert upload(first, {"address_proof_bank_statement": content}).status_code == 200
+    assert upload(first, {"address_proof_bank_statement": b"%PDF-1.4 newer statement"}).status_code == 200
+    with engine.begin() as conn:
+        conn.execute(
+            update(DocumentBlob).where(DocumentBlob.checksum == checksum)
+            .values(updated_at=datetime.now(timezone.utc) - timedelta(days=1))
+        )
+    
+    # A new reference before the collector runs revives the blob (and its grace period)
+    assert upload(second, {"address_proof_bank_statement": content}).status_code == 200
+    collect_garbage(engine)
+    path, ref_count = blob_row(checksum)
+    assert ref_count == 1
+    assert os.path.exists(path)
\ No newline at end of file
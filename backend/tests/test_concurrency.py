@@ -0,0 +1,157 @@
+"""
+Races between requests (and job workers) that must end in a conflict or be
+serialized, never in double counting.
+
+Interleavings are forced with conftest.on_statement: a competing write
+runs on its own connection at a chosen point of the request.
+"""
+import asyncio
+import hashlib
+import os
+from datetime import datetime, timedelta, timezone
+
+import httpx
+from sqlalchemy import func, select, update
+
+from conftest import on_statement
+from blob_store import blob_path
+from database import engine
+from jobs import claim_jobs
+from models import DocumentBlob, DocumentJob, JobStatus, Vendor, VendorDocument, VendorStatus, VendorStatusCount
+
+def status_counts() -> dict:
+    with engine.connect() as conn:
+        return dict(conn.execute(select(VendorStatusCount.status, VendorStatusCount.count)).all())
+
+def test_status_update_conflicts_with_concurrent_review(client, admin_headers, register_vendor):
+    vendor_id = register_vendor()
+    counts = status_counts()
+    
+    def concurrent_review():
+        with engine.begin() as conn:
+            conn.execute(
+                update(Vendor).where(Vendor.vendor_id == vendor_id)
+                .values(status=VendorStatus.REJECTED, rejection_reason="Blurry documents")
+            )
+    
+    with on_statement("UPDATE vendors", concurrent_review) as fired:
+        response = client.put(
+            f"/api/admin/vendors/{vendor_id}/status", json={"status": "approved"}, headers=admin_headers
+        )
+    assert fired
+    assert response.status_code == 409, response.text
+    with engine.connect() as conn:
+        assert conn.execute(select(Vendor.status).where(Vendor.vendor_id == vendor_id)).scalar_one() == VendorStatus.REJECTED
+    # The losing request's counter changes were rolled back with it
+    assert status_counts() == counts
+
+def test_status_update_moves_counters(client, admin_headers, register_vendor):
+    vendor_id = register_vendor()
+    counts = status_counts()
+    
+    response = client.put(f"/api/admin/vendors/{vendor_id}/status", json={"status": "approved"}, headers=admin_headers)
+    assert response.status_code == 200, response.text
+    assert response.json()["status"] == "approved"
+    after = status_counts()
+    assert after["pending"] == counts["pending"] - 1
+    assert after["approved"] == counts["approved"] + 1
+
+def test_upload_conflicts_with_concurrent_upload(client, register_vendor, upload):
+    vendor_id = register_vendor()
+    first, second = b"%PDF-1.4 first version", b"%PDF-1.4 second version"
+    assert upload(vendor_id, {"pan_document": first}).status_code == 200
+    first_checksum = hashlib.sha256(first).hexdigest()
+    second_checksum = hashlib.sha256(second).hexdigest()
+    competing_checksum = "0" * 64
+    
+    def concurrent_upload():
+        # Another upload replaces the document after this request has read it
+        with engine.begin() as conn:
+            conn.execute(
+                update(VendorDocument)
+                .where(VendorDocument.vendor_id == vendor_id, VendorDocument.doc_type == "pan")
+                .values(checksum=competing_checksum)
+            )
+    
+    with on_statement("SELECT vendor_documents.", concurrent_upload, after=True) as fired:
+        response = upload(vendor_id, {"pan_document": second})
+    assert fired
+    assert response.status_code == 409, response.text
+    with engine.connect() as conn:
+        document_checksum = conn.execute(
+            select(VendorDocument.checksum)
+            .where(VendorDocument.vendor_id == vendor_id, VendorDocument.doc_type == "pan")
+        ).scalar_one()
+        refs = dict(conn.execute(
+            select(DocumentBlob.checksum, DocumentBlob.ref_count)
+            .where(DocumentBlob.checksum.in_([first_checksum, second_checksum]))
+        ).all())
+    assert document_checksum == competing_checksum
+    # Neither blob reference was touched and the new content was not kept
+    assert refs == {first_checksum: 1}
+    assert not os.path.exists(blob_path(second_checksum, ".pdf"))
+
+def test_concurrent_uploads_keep_blob_refs_exact(client, register_vendor):
+    vendor_id = register_vendor()
+    contents = [(f"%PDF-1.4 pan {n}".encode(), f"%PDF-1.4 aadhaar {n}".encode()) for n in range(8)]
+    checksums = [hashlib.sha256(content).hexdigest() for pair in contents for content in pair]
+    
+    async def upload_concurrently():
+        transport = httpx.ASGITransport(app=client.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as async_client:
+            return await asyncio.gather(*(
+                async_client.post(f"/api/vendor/upload-documents/{vendor_id}", files={
+                    "pan_document": ("pan.pdf", pan, "application/pdf"),
+                    "aadhaar_document": ("aadhaar.pdf", aadhaar, "application/pdf"),
+                })
+                for pan, aadhaar in contents
+            ))
+    
+    responses = client.portal.call(upload_concurrently)
+    codes = [response.status_code for response in responses]
+    assert set(codes) <= {200, 409}
+    assert 200 in codes
+    with engine.connect() as conn:
+        documents = dict(conn.execute(
+            select(VendorDocument.checksum, func.count())
+            .where(VendorDocument.checksum.in_(checksums))
+            .group_by(VendorDocument.checksum)
+        ).all())
+        refs = dict(conn.execute(
+            select(DocumentBlob.checksum, DocumentBlob.ref_count).where(DocumentBlob.checksum.in_(checksums))
+        ).all())
+    assert {checksum: count for checksum, count in refs.items() if count} == documents
+
+def test_claim_jobs_gives_each_job_to_one_worker(client, register_vendor):
+    vendor_id = register_vendor()
+    run_after = datetime.now(timezone.utc) - timedelta(minutes=1)
+    with engine.begin() as conn:
+        job_ids = set(conn.execute(
+            DocumentJob.__table__.insert().returning(DocumentJob.id),
+            [
+                {"vendor_id": vendor_id, "doc_type": "pan", "path": "unused.pdf", "kind": "checks",
+                 "status": JobStatus.QUEUED, "attempts": 0, "run_after": run_after}
+                for _ in range(20)
+            ],
+        ).scalars())
+    
+    async def claim_concurrently():
+        return await asyncio.gather(*(claim_jobs(f"worker-{n}", 5) for n in range(4)))
+    
+    claimed = {}
+    while True:
+        batches = client.portal.call(claim_concurrently)
+        if not any(batches):
+            break
+        for n, batch in enumerate(batches):
+            for job in batch:
+                assert job.id not in claimed, f"job {job.id} claimed twice"
+                claimed[job.id] = f"worker-{n}"
+    assert job_ids <= set(claimed)
+    with engine.connect() as conn:
+        rows = conn.execute(
+            select(DocumentJob.id, DocumentJob.status, DocumentJob.locked_by, DocumentJob.attempts)
+            .where(DocumentJob.id.in_(job_ids))
+        ).all()
+    for job_id, job_status, locked_by, attempts in rows:
+        assert (job_status, locked_by, attempts) == (JobStatus.RUNNING, claimed[job_id], 1)
\ No newline at end of file
@@ -0,0 +1,50 @@
+"""
+Keyset cursors: pages continue exactly where the previous one ended, also
+across rows that share a created_at (SQLite stores whole seconds).
+"""
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import func, select, update
+
+from database import engine
+from models import Vendor
+from pagination import decode_cursor, encode_cursor
+
+def test_cursor_round_trip():
+    created_at = datetime(2024, 5, 1, 9, 30, 15, tzinfo=timezone.utc)
+    assert decode_cursor(encode_cursor(created_at, 42)) == (created_at, 42)
+    assert decode_cursor(encode_cursor(None, 7)) == (None, 7)
+
+def test_invalid_cursor_is_rejected():
+    with pytest.raises(HTTPException) as error:
+        decode_cursor("not-a-cursor")
+    assert error.value.status_code == 400
+
+def test_vendor_pages_across_equal_created_at(client, admin_headers, register_vendor):
+    vendor_ids = [register_vendor() for _ in range(5)]
+    # Newest of all and the same second for every one of them
+    with engine.begin() as conn:
+        conn.execute(
+            update(Vendor).where(Vendor.vendor_id.in_(vendor_ids))
+            .values(created_at=datetime(2100, 1, 1, 12, 0, 0, tzinfo=timezone.utc))
+        )
+        total = conn.execute(select(func.count()).select_from(Vendor)).scalar_one()
+    
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, "fields": "vendor_id"}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/api/admin/vendors", params=params, headers=admin_headers)
+        assert response.status_code == 200, response.text
+        page = response.json()
+        seen.extend(item["vendor_id"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    
+    assert len(seen) == len(set(seen)) == total
+    # Ties are broken by id, newest first
+    assert seen[:5] == vendor_ids[::-1]
\ No newline at end of file